@@ -5,18 +5,26 @@ Tests threading, database operations, error handling, and edge cases
 """
 
 import os
+import io
+import glob
+import stat
 import time
+import queue
+import shutil
+import sqlite3
+import zipfile
 import tempfile
 import unittest
-import sqlite3
 import threading
-from unittest.mock import Mock, patch
+from contextlib import redirect_stdout
+from unittest.mock import patch
 from pathlib import Path
 
+import drive_processor
 from drive_processor import SequentialDriveProcessor, ThreadedDriveProcessor, DriveProcessingResult
 from database import DatabaseManager
-from scanner import DriveScanner, ZipFileScanner
-from zip_scanner import PySearchZips
+from scanner import ZipFileScanner
+from progress import BufferedConsole, ProgressDisplay, StatusReporter, console
 
 
 class TestDriveProcessors(unittest.TestCase):
@@ -31,10 +39,41 @@ class TestDriveProcessors(unittest.TestCase):
             'quiet_mode': True
         }
         self.temp_db_path = tempfile.mktemp(suffix='.db')
+        self._temp_db_paths = [self.temp_db_path]
+        self._temp_dirs = []
     
     def tearDown(self):
-        if os.path.exists(self.temp_db_path):
-            os.unlink(self.temp_db_path)
+        for temp_dir in self._temp_dirs:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        for db_path in self._temp_db_paths:
+            # The database, its WAL files and any thread databases left behind
+            paths = [db_path + suffix for suffix in ('', '-wal', '-shm')]
+            for path in paths + glob.glob(glob.escape(db_path) + ".thread_*"):
+                if os.path.exists(path):
+                    os.unlink(path)
+    
+    def make_db_path(self) -> str:
+        """Return a new database path, removed with its WAL files after the test"""
+        db_path = tempfile.mktemp(suffix='.db')
+        self._temp_db_paths.append(db_path)
+        return db_path
+    
+    def make_drive(self) -> str:
+        """Create a drive directory with an empty GoogleTakeout folder, removed after the test"""
+        drive = tempfile.mkdtemp()
+        self._temp_dirs.append(drive)
+        os.mkdir(os.path.join(drive, "GoogleTakeout"))
+        return drive
+    
+    def write_zip(self, drive: str, name: str, count: int = 1, mtime: float = None) -> str:
+        """Write a GoogleTakeout zip on drive holding count videos named after the zip"""
+        zip_path = os.path.join(drive, "GoogleTakeout", name)
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            for i in range(count):
+                zf.writestr(f"Takeout/{name}_{i}.mp4", b"data")
+        if mtime is not None:
+            os.utime(zip_path, (mtime, mtime))
+        return zip_path
     
     def test_01_sequential_processor_initialization(self):
         """Test 1: Sequential processor initializes correctly"""
@@ -320,6 +359,390 @@ class TestDriveProcessors(unittest.TestCase):
             if os.path.exists(path):
                 os.unlink(path)
 
+    
+    def test_13_search_index_matches_like(self):
+        """Test 13: Indexed filename search keeps LIKE substring semantics"""
+        db = DatabaseManager(self.temp_db_path)
+        files = [
+            ("Holiday_Beach.MP4", 1024, "Takeout/Holiday_Beach.MP4", None),
+            ("birthday.mov", 2048, "Takeout/birthday.mov", None),
+            ("ab.mp4", 512, "Takeout/ab.mp4", None),
+        ]
+        db.insert_zip_data("/test/search.zip", files, None, "S")
+        
+        self.assertEqual([r[3] for r in db.search_files("beach")], ["Holiday_Beach.MP4"])
+        self.assertEqual(len(db.search_files("DAY")), 2)
+        self.assertEqual(len(db.search_files("ab")), 1)
+        self.assertEqual(len(db.search_files("nomatch")), 0)
+        self.assertEqual(len(db.search_files("", file_types=["mp4"])), 2)
+        self.assertEqual(len(db.search_files("day", file_types=[".MOV"])), 1)
+        self.assertEqual([r[3] for r in db.search_files(r"^holiday_\w+\.mp4$", regex=True)], ["Holiday_Beach.MP4"])
+        db.close()
+
+    
+    def test_14_read_cache_invalidated_by_writes(self):
+        """Test 14: Cached search and summary results refresh after inserts"""
+        db = DatabaseManager(self.temp_db_path)
+        db.insert_zip_data("/test/cache_1.zip", [("clip_1.mp4", 100, "clip_1.mp4", None)], None, "C")
+        self.assertEqual(len(db.search_files("clip")), 1)
+        self.assertEqual(db.get_database_summary()['video_files'], 1)
+        
+        db.insert_zip_data("/test/cache_2.zip", [("clip_2.mp4", 200, "clip_2.mp4", None)], None, "C")
+        self.assertEqual(len(db.search_files("clip")), 2)
+        self.assertEqual(db.get_database_summary()['video_files'], 2)
+        self.assertEqual(len(db.list_zip_archives()), 2)
+        db.close()
+
+    
+    def test_15_merge_skips_existing_zips(self):
+        """Test 15: Re-merging a source adds no duplicate zips or files"""
+        main_db = DatabaseManager(self.temp_db_path)
+        source_path = tempfile.mktemp(suffix='_rescan.db')
+        source_db = DatabaseManager(source_path)
+        files = [(f"rescan_{j}.mp4", 1024, f"rescan/{j}.mp4", None) for j in range(3)]
+        source_db.insert_zip_data("/test/rescan.zip", files, None, "R")
+        source_db.close()
+        
+        try:
+            main_db.merge_databases([source_path], None)
+            main_db.merge_databases([source_path], None)
+            stats = main_db.get_database_summary()
+            self.assertEqual(stats['zip_files'], 1)
+            self.assertEqual(stats['video_files'], 3)
+        finally:
+            main_db.close()
+            os.unlink(source_path)
+
+    
+    def test_16_merge_loop_merges_queued_databases(self):
+        """Test 16: The background merger merges and removes queued thread databases"""
+        main_db = DatabaseManager(self.temp_db_path)
+        merge_queue = queue.SimpleQueue()
+        for i in range(2):
+            source_path = tempfile.mktemp(suffix=f'_merge_{i}.db')
+            source_db = DatabaseManager(source_path)
+            source_db.insert_zip_data(f"/test/merge_{i}.zip", [(f"merge_{i}.mp4", 1024, f"merge_{i}.mp4", None)], None, "M")
+            source_db.close()
+            merge_queue.put(source_path)
+        merge_queue.put(None)
+        
+        processor = ThreadedDriveProcessor(self.test_config, threading.Lock())
+        errors = []
+        processor._merge_loop(merge_queue, main_db, errors)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(main_db.get_database_summary()['video_files'], 2)
+        main_db.close()
+
+    
+    def test_17_transaction_commits_once(self):
+        """Test 17: Inserts inside transaction() become visible only when it exits"""
+        db = DatabaseManager(self.temp_db_path)
+        with db.transaction():
+            for i in range(3):
+                db.insert_zip_data(f"/test/txn_{i}.zip", [(f"txn_{i}.mp4", 100, f"txn_{i}.mp4", None)], None, "T")
+            self.assertEqual(db.get_database_summary()['zip_files'], 0)
+        self.assertEqual(db.get_database_summary()['zip_files'], 3)
+        db.close()
+
+    
+    def test_18_scratch_database_skips_helper_indexes(self):
+        """Test 18: Scratch databases load without helper indexes and still merge"""
+        source_path = tempfile.mktemp(suffix='_scratch.db')
+        source_db = DatabaseManager(source_path, scratch=True)
+        source_db.insert_zip_data("/test/scratch.zip", [("scratch_clip.mp4", 100, "scratch_clip.mp4", None)], None, "S")
+        index_names = {row[0] for row in source_db.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('index', 'table') AND name NOT LIKE 'sqlite_%'")}
+        source_db.close()
+        self.assertNotIn('idx_file_contents_name', index_names)
+        self.assertNotIn('file_contents_fts', index_names)
+        
+        main_db = DatabaseManager(self.temp_db_path)
+        try:
+            main_db.merge_databases([source_path], None)
+            self.assertEqual([r[3] for r in main_db.search_files("scratch")], ["scratch_clip.mp4"])
+        finally:
+            main_db.close()
+            os.unlink(source_path)
+
+    
+    def test_19_central_directory_scan_matches_zipfile(self):
+        """Test 19: The direct central directory scan finds what zipfile lists"""
+        zip_path = tempfile.mktemp(suffix='.zip')
+        names = ["a.mp4", "b/Clip.MOV", "dir/", ".mp4", "x/.mkv", "caf\u00e9.mkv", "notes.txt", "movie.mp4.txt"]
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.comment = b"archive comment"
+            for name in names:
+                zf.writestr(name, b"data")
+        
+        scanner = ZipFileScanner({})
+        try:
+            for all_files in (False, True):
+                with zipfile.ZipFile(zip_path) as zf:
+                    expected = [(os.path.basename(i.filename), i.file_size, i.filename, None)
+                                for i in zf.infolist()
+                                if not i.is_dir() and scanner.is_target_file(i.filename, all_files)]
+                self.assertEqual(scanner.scan_zip_for_videos(zip_path, all_files), expected)
+        finally:
+            os.unlink(zip_path)
+    
+    def test_20_uuid_keyed_database_is_migrated(self):
+        """Test 20: File rows keyed by zip UUID are rekeyed by zip id on open"""
+        conn = sqlite3.connect(self.temp_db_path)
+        conn.executescript('''
+            CREATE TABLE zip_files (id INTEGER PRIMARY KEY AUTOINCREMENT, drive_letter TEXT NOT NULL,
+                zip_file_name TEXT NOT NULL, zip_file_path TEXT NOT NULL UNIQUE, uuid TEXT NOT NULL UNIQUE,
+                file_size INTEGER, file_hash TEXT, last_modified TIMESTAMP,
+                scan_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE file_contents (id INTEGER PRIMARY KEY AUTOINCREMENT, zip_uuid TEXT NOT NULL,
+                file_name TEXT NOT NULL, file_size INTEGER NOT NULL, file_path_in_zip TEXT NOT NULL,
+                file_hash TEXT, created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+            INSERT INTO zip_files (drive_letter, zip_file_name, zip_file_path, uuid)
+                VALUES ('M', 'old.zip', '/test/old.zip', 'old-uuid');
+            INSERT INTO file_contents (zip_uuid, file_name, file_size, file_path_in_zip)
+                VALUES ('old-uuid', 'old_clip.mp4', 1024, 'old/old_clip.mp4');
+        ''')
+        conn.close()
+        
+        db = DatabaseManager(self.temp_db_path)
+        try:
+            self.assertEqual(db.search_files("old_clip"),
+                             [('M', 'old.zip', '/test/old.zip', 'old_clip.mp4', 1024, 'old/old_clip.mp4')])
+            self.assertEqual(db.get_zip_info_by_uuid('old-uuid'), ('/test/old.zip', 'old.zip', 'M', 1))
+        finally:
+            db.close()
+
+    
+    def test_21_rescan_skips_unchanged_zips(self):
+        """Test 21: A rescan reads only zips that are new or changed on disk"""
+        drive = self.make_drive()
+        processor = SequentialDriveProcessor(self.test_config)
+        db = DatabaseManager(self.temp_db_path)
+        try:
+            self.write_zip(drive, "first.zip")
+            self.assertEqual(processor.process_all_drives([drive], db), (1, 1))
+            
+            second = self.write_zip(drive, "second.zip")
+            with patch.object(processor.zip_scanner, 'scan_zip_for_videos',
+                              wraps=processor.zip_scanner.scan_zip_for_videos) as scan, \
+                    patch.object(processor, '_print') as printed:
+                self.assertEqual(processor.process_all_drives([drive], db), (1, 1))
+            self.assertEqual([c.args[0] for c in scan.call_args_list], [second])
+            self.assertTrue(any("1 unchanged, 1 to process" in c.args[0] for c in printed.call_args_list))
+            self.assertEqual(db.get_database_summary()['zip_files'], 2)
+        finally:
+            db.close()
+
+    
+    def test_22_printer_thread_carries_status_lines(self):
+        """Test 22: Status lines go out through the printer thread, in order"""
+        processor = ThreadedDriveProcessor(self.test_config)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            processor._start_printer()
+            processor._print("first")
+            StatusReporter().report_error("C:", "failed")
+            processor._print("last")
+            processor._stop_printer()
+        
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], "first")
+        self.assertIn("ERROR: failed", lines[1])
+        self.assertEqual(lines[2], "last")
+
+    
+    def test_23_progress_off_terminal_is_plain(self):
+        """Test 23: Without a terminal, progress is logged as plain lines every few percent"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            display = ProgressDisplay()
+            for i in range(101):
+                display.print_progress_bar(i / 100, drive_name="C:", current=i, total=100)
+            console.flush()
+        
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 21)
+        self.assertEqual(lines[-1], "[C:] 100% 100/100")
+        self.assertNotIn("\r", output.getvalue())
+        self.assertNotIn("\x1b", output.getvalue())
+
+    
+    def test_24_multi_row_insert_keeps_every_row(self):
+        """Test 24: Inserts spanning several multi-row chunks keep every file, in order"""
+        db = DatabaseManager(self.temp_db_path)
+        files = [(f"clip_{i:04d}.mp4", i, f"Takeout/clip_{i:04d}.mp4", None) for i in range(400)]
+        db.insert_zip_data("/test/chunks.zip", files, None, "C")
+        
+        names = [r[3] for r in db.search_files("clip_")]
+        self.assertEqual(sorted(names), [f[0] for f in files])
+        self.assertEqual([r[3] for r in db.search_files("clip_0399")], ["clip_0399.mp4"])
+        self.assertEqual(db.get_database_summary()['video_files'], 400)
+        db.close()
+
+    
+    @unittest.skipIf(hasattr(os, 'geteuid') and os.geteuid() == 0, "root can write to read-only directories")
+    def test_25_database_in_read_only_directory_is_searchable(self):
+        """Test 25: A database in a read-only directory opens read-only and can be searched"""
+        directory = tempfile.mkdtemp()
+        db_path = os.path.join(directory, "index.db")
+        db = DatabaseManager(db_path)
+        db.insert_zip_data("/test/ro.zip", [("ro_clip.mp4", 1024, "ro/ro_clip.mp4", None)], None, "R")
+        db.close()
+        
+        os.chmod(db_path, stat.S_IRUSR)
+        os.chmod(directory, stat.S_IRUSR | stat.S_IXUSR)
+        try:
+            db = DatabaseManager(db_path)
+            try:
+                self.assertTrue(db.read_only)
+                self.assertEqual([r[3] for r in db.search_files("ro_clip")], ["ro_clip.mp4"])
+                self.assertEqual(db.get_database_summary()['video_files'], 1)
+            finally:
+                db.close()
+        finally:
+            os.chmod(directory, stat.S_IRWXU)
+            shutil.rmtree(directory)
+
+    
+    def test_26_rescan_replaces_changed_zips(self):
+        """Test 26: A zip changed on disk replaces its stored rows on rescan, in both modes"""
+        for processor_class in (SequentialDriveProcessor, ThreadedDriveProcessor):
+            drive = self.make_drive()
+            processor = processor_class(self.test_config)
+            db = DatabaseManager(self.make_db_path())
+            try:
+                self.write_zip(drive, "a.zip", 2, 1000000000)
+                self.write_zip(drive, "b.zip", 1, 1000000000)
+                self.assertEqual(processor.process_all_drives([drive], db), (2, 3))
+                
+                self.write_zip(drive, "a.zip", 5, 1000000100)
+                self.write_zip(drive, "c.zip", 3, 1000000000)
+                self.assertEqual(processor.process_all_drives([drive], db), (2, 8))
+                
+                stats = db.get_database_summary()
+                self.assertEqual((stats['zip_files'], stats['video_files']), (3, 9), processor_class.__name__)
+                self.assertEqual(len(db.search_files("a.zip_")), 5)
+            finally:
+                db.close()
+
+    
+    def test_27_failed_zip_insert_keeps_rest_of_drive(self):
+        """Test 27: A zip that cannot be stored is reported and the drive's other zips are kept"""
+        insert_entries = DatabaseManager._insert_entries
+        
+        def failing_insert(db, entries, *args, **kwargs):
+            if any(entry[1].endswith("b.zip") for entry in entries):
+                raise sqlite3.IntegrityError("simulated failure")
+            return insert_entries(db, entries, *args, **kwargs)
+        
+        for processor_class in (SequentialDriveProcessor, ThreadedDriveProcessor):
+            drive = self.make_drive()
+            for name, count in (("a.zip", 2), ("b.zip", 1), ("c.zip", 3)):
+                self.write_zip(drive, name, count)
+            
+            processor = processor_class(self.test_config)
+            db = DatabaseManager(self.make_db_path())
+            try:
+                with patch.object(DatabaseManager, '_insert_entries', failing_insert), \
+                        patch.object(processor.status, 'report_error') as report_error:
+                    self.assertEqual(processor.process_all_drives([drive], db), (2, 5), processor_class.__name__)
+                
+                report_error.assert_called_once()
+                self.assertIn("b.zip", report_error.call_args[0][1])
+                stats = db.get_database_summary()
+                self.assertEqual((stats['zip_files'], stats['video_files']), (2, 5))
+            finally:
+                db.close()
+
+    
+    def test_28_zip_with_prepended_data_is_scanned(self):
+        """Test 28: An archive with data before the ZIP, like a self-extractor, is still scanned"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr("Takeout/clip.mp4", b"data")
+            zf.writestr("Takeout/notes.txt", b"text")
+        zip_path = tempfile.mktemp(suffix='.zip')
+        with open(zip_path, 'wb') as f:
+            f.write(b'MZ' + b'\0' * 1022 + buffer.getvalue())
+        
+        try:
+            scanner = ZipFileScanner({})
+            self.assertEqual(scanner.scan_zip_for_videos(zip_path),
+                             [("clip.mp4", 4, "Takeout/clip.mp4", None)])
+            
+            # Without an end record the file is still rejected
+            with open(zip_path, 'wb') as f:
+                f.write(b'MZ' + b'\0' * 1022)
+            self.assertEqual(scanner.scan_zip_for_videos(zip_path), [])
+        finally:
+            os.unlink(zip_path)
+
+    
+    def test_29_read_cache_sees_other_connections_writes(self):
+        """Test 29: Cached reads refresh when another manager writes to the same database"""
+        db = DatabaseManager(self.temp_db_path)
+        other = DatabaseManager(self.temp_db_path)
+        try:
+            db.insert_zip_data("/test/shared_1.zip", [("clip_1.mp4", 100, "clip_1.mp4", None)], None, "C")
+            self.assertEqual(len(db.search_files("clip")), 1)
+            self.assertEqual(db.get_database_summary()['video_files'], 1)
+            self.assertEqual(len(db.list_zip_archives()), 1)
+            
+            other.insert_zip_data("/test/shared_2.zip", [("clip_2.mp4", 200, "clip_2.mp4", None)], None, "C")
+            self.assertEqual(len(db.search_files("clip")), 2)
+            self.assertEqual(db.get_database_summary()['video_files'], 2)
+            self.assertEqual(len(db.list_zip_archives()), 2)
+        finally:
+            other.close()
+            db.close()
+
+    
+    def test_30_held_back_console_text_is_flushed(self):
+        """Test 30: A redraw held back by the console buffer is written without another emit"""
+        written = []
+        buffered = BufferedConsole(interval=0.05)
+        buffered.redirect(written.append)
+        buffered.emit("\rfirst")
+        buffered.emit("\rsecond")
+        
+        deadline = time.monotonic() + 2
+        while "".join(written) != "\rfirst\rsecond" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual("".join(written), "\rfirst\rsecond")
+
+    
+    def test_31_dead_merger_fails_the_scan(self):
+        """Test 31: A merger that dies raises its error instead of blocking result collection"""
+        drives = [self.make_drive() for _ in range(3)]
+        for drive in drives:
+            self.write_zip(drive, "a.zip")
+        
+        processor = ThreadedDriveProcessor(self.test_config)
+        db = DatabaseManager(self.temp_db_path)
+        try:
+            with patch.object(drive_processor, 'MERGE_QUEUE_SIZE', 1), \
+                    patch.object(drive_processor, 'MERGE_QUEUE_TIMEOUT', 0.05), \
+                    patch.object(processor, '_merge_loop', side_effect=RuntimeError("merger failed")):
+                with self.assertRaisesRegex(RuntimeError, "merger failed"):
+                    processor.process_all_drives(drives, db)
+        finally:
+            db.close()
+
+    
+    def test_32_merge_inside_transaction_raises(self):
+        """Test 32: Merging or optimizing inside transaction() raises instead of deadlocking"""
+        db = DatabaseManager(self.temp_db_path)
+        try:
+            with db.transaction():
+                db.insert_zip_data("/test/txn.zip", [("txn.mp4", 100, "txn.mp4", None)], None, "T")
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    db.merge_databases([self.temp_db_path + ".missing"])
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    db.optimize()
+            self.assertEqual(db.get_database_summary()['zip_files'], 1)
+        finally:
+            db.close()
+
 
 class TestIntegrationScenarios(unittest.TestCase):
     """Integration tests for real-world scenarios"""
@@ -340,6 +763,9 @@ class TestIntegrationScenarios(unittest.TestCase):
     
     def test_12_end_to_end_workflow(self):
         """Test 12: Complete end-to-end scanning workflow"""
+        # Imported here so collecting the unit tests doesn't load the CLI
+        from zip_scanner import PySearchZips
+        
         scanner = PySearchZips(self.temp_db_path)
         scanner.config = self.test_config
         scanner.quiet_mode = True
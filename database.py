@@ -6,30 +6,346 @@ Handles SQLite database initialization, insertions, and queries
 
 import sqlite3
 import os
+import re
+import threading
+import functools
+import itertools
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple, Optional
+from pathlib import Path
+from typing import List, Tuple, Optional, Iterator, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Explicit adapters with the same text format the stdlib defaults produce
+# (those are deprecated from Python 3.12); keeps stored timestamps unchanged
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(uuid.UUID, str)
+
+# Applied to every connection we open. journal_mode=WAL is persistent and is
+# set once in init_database; these settings are per-connection. WAL makes the
+# per-commit fsync of synchronous=FULL unnecessary, and the 64MB page cache
+# keeps the file_contents B-tree resident during bulk inserts. Memory-mapping
+# the first 256MB lets reads skip the copy into the page cache.
+CONNECTION_PRAGMAS = '''
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+'''
+
+# Columns copied by merge_databases; ids are left for the target to assign
+ZIP_COLUMNS = ('drive_letter, zip_file_name, zip_file_path, uuid, '
+               'file_size, file_hash, last_modified, scan_date')
+# file_count and ext are copied separately so sources predating them can still be merged
+SOURCE_FILE_COUNT = '(SELECT COUNT(*) FROM {src}.file_contents f WHERE f.zip_uuid = {src}.zip_files.uuid)'
+CONTENT_COLUMNS = ('file_name', 'file_size', 'file_path_in_zip', 'file_hash', 'created_at')
+# Source zips not yet in the target; both lookups use the UNIQUE indexes
+NEW_SOURCE_ZIP = ('NOT EXISTS (SELECT 1 FROM main.zip_files m WHERE m.zip_file_path = {src}.zip_files.zip_file_path) '
+                  'AND NOT EXISTS (SELECT 1 FROM main.zip_files m WHERE m.uuid = {src}.zip_files.uuid)')
+
+# Write connections of scratch databases - the per-thread files a threaded
+# scan merges and deletes. Losing one to a crash only means rescanning that
+# drive, so skip fsync entirely and give the bulk load more cache
+SCRATCH_PRAGMAS = '''
+    PRAGMA synchronous=OFF;
+    PRAGMA cache_size=-131072;
+'''
+
+# Extra settings for the cached per-thread read connections
+READER_PRAGMAS = '''
+    PRAGMA query_only=1;
+    PRAGMA cache_size=-32768;
+'''
+
+# Insert statements kept as constants so the cached write connection's
+# statement cache sees the identical SQL text on every batch. Zips are never
+# hashed and most scans hash no files, so those rows leave file_hash to its
+# NULL default instead of binding it
+INSERT_ZIP_SQL = '''
+    INSERT INTO zip_files (id, drive_letter, zip_file_name, zip_file_path, uuid,
+                           file_size, last_modified, scan_date, file_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Zips are numbered by the inserting batch itself, the way SQLite would
+# number them, so their file rows can be keyed before any zip is written.
+# A replaced zip loses its file rows in the same transaction, so an id
+# handed out again never picks up old files
+NEXT_ZIP_ID_SQL = 'SELECT COALESCE(MAX(id), 0) + 1 FROM zip_files'
+# A zip stored again, because it changed since it was last scanned,
+# replaces its old rows; the FTS delete trigger clears their search entries
+DELETE_ZIP_CONTENTS_SQL = '''
+    DELETE FROM file_contents WHERE zip_id IN (SELECT id FROM zip_files WHERE zip_file_path = ?)
+'''
+DELETE_ZIP_SQL = 'DELETE FROM zip_files WHERE zip_file_path = ?'
+INSERT_CONTENT_SQL = '''
+    INSERT INTO file_contents (zip_id, file_name, file_size, file_path_in_zip, file_hash, created_at, ext)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+INSERT_CONTENT_NO_HASH_SQL = '''
+    INSERT INTO file_contents (zip_id, file_name, file_size, file_path_in_zip, created_at, ext)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# file_contents rows point at their zip by its integer id: 8 bytes per row
+# instead of a 36 character UUID, and joins compare integers. The UUID stays
+# on zip_files as the zip's external identifier. Like zip_files, the id is a
+# plain rowid alias without AUTOINCREMENT, which would update sqlite_sequence
+# on every insert only to stop ids of deleted rows being reused; rows are
+# only ever appended
+FILE_CONTENTS_COLUMNS = '''
+    id INTEGER PRIMARY KEY,
+    zip_id INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_path_in_zip TEXT NOT NULL,
+    file_hash TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ext TEXT,
+    FOREIGN KEY (zip_id) REFERENCES zip_files (id)
+'''
+
+# The trigram index can only narrow a LIKE pattern holding three characters
+# in a row that are not wildcards; for shorter ones FTS5 would scan its whole
+# index, reading every name back from file_contents, so those use plain LIKE
+TRIGRAM_RUN = re.compile(r'[^%_]{3}')
+
+# Read result caching: search/listing result rows kept per manager, in
+# total, so a few huge result lists cannot pin an unbounded amount of memory
+QUERY_CACHE_ROWS = 100000
+
+# UUIDs handed out per os.urandom call on the buffered insert path
+UUID_POOL_SIZE = 256
+
+# Bound values per multi-row INSERT, the host parameter limit of SQLite
+# builds before 3.32. Binding a chunk of rows to one statement saves the
+# per-row statement executions of executemany; the FTS trigger still fires
+# once for every row
+MAX_BOUND_PARAMETERS = 999
+
+def generate_uuids(count: int) -> List[str]:
+    """Generate count random (version 4) UUID strings from one os.urandom call"""
+    buf = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=buf[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+def zip_metadata(stat_info: os.stat_result) -> Tuple[int, str]:
+    """(file_size, last_modified) of a zip as stored in zip_files"""
+    return stat_info.st_size, datetime.fromtimestamp(stat_info.st_mtime).isoformat(" ")
+
+def file_extension(file_name: str) -> str:
+    """Normalized extension stored in file_contents.ext: lowercase, no dot"""
+    return os.path.splitext(file_name)[1][1:].lower()
+
+@functools.lru_cache(maxsize=None)
+def _multi_row_sql(sql: str, rows: int) -> str:
+    """Repeat the VALUES tuple of a single-row INSERT rows times"""
+    values = sql[sql.rindex('('):].strip()
+    return sql.rstrip() + (', ' + values) * (rows - 1)
+
+def insert_rows(cursor: sqlite3.Cursor, sql: str, width: int, rows):
+    """Run a single-row INSERT for each of rows, width values each, in chunks
+    
+    Full chunks go out as one multi-row statement; the remainder uses
+    executemany, so each INSERT has just two SQL texts to cache.
+    """
+    chunk_rows = MAX_BOUND_PARAMETERS // width
+    chunk_sql = _multi_row_sql(sql, chunk_rows)
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if len(chunk) < chunk_rows:
+            if chunk:
+                cursor.executemany(sql, chunk)
+            return
+        cursor.execute(chunk_sql, list(itertools.chain.from_iterable(chunk)))
+
+@functools.lru_cache(maxsize=256)
+def _compile_regex(pattern: str) -> re.Pattern:
+    """Compile a search pattern once, not once per row it is tested against"""
+    return re.compile(pattern, re.IGNORECASE)
+
+def _is_read_only_error(error: sqlite3.Error) -> bool:
+    """True for SQLITE_READONLY and its extended codes"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff == sqlite3.SQLITE_READONLY
+    return 'readonly' in str(error)
+
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    """SQLite REGEXP function: "X REGEXP Y" calls it as (Y, X)
+    
+    Case-insensitive, like the LIKE searches.
+    """
+    return value is not None and _compile_regex(pattern).search(value) is not None
+
+class _ResultCache:
+    """Query results of one database version, least recently used dropped first
+    
+    At most max_rows result rows are kept over all entries; a result larger
+    than that is returned without being cached.
+    """
+    
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._rows = 0
+        self._version = None
+        self._lock = threading.Lock()
+    
+    def get(self, version, key, compute):
+        """Return the cached result for key at version, or compute() and cache it
+        
+        version must be read before compute() runs, so a result that might
+        predate a commit is never filed under the version after it.
+        """
+        with self._lock:
+            if version != self._version:
+                self._clear_locked()
+                self._version = version
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                return rows
+        
+        rows = compute()
+        if len(rows) <= self.max_rows:
+            with self._lock:
+                if version == self._version and key not in self._entries:
+                    self._entries[key] = rows
+                    self._rows += len(rows)
+                    while self._rows > self.max_rows:
+                        _, dropped = self._entries.popitem(last=False)
+                        self._rows -= len(dropped)
+        return rows
+    
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+            self._version = None
+    
+    def _clear_locked(self):
+        self._entries.clear()
+        self._rows = 0
+
+class _PendingWrite:
+    """Insert entries waiting for a combining writer to commit them"""
+    
+    def __init__(self, entries, metadata, heartbeat_callback):
+        self.entries = entries
+        self.metadata = metadata
+        self.heartbeat_callback = heartbeat_callback
+        self.done = False
+        self.error = None
+
 class DatabaseManager:
     """Handles all database operations for ZIP file scanning"""
     
-    def __init__(self, database_path: str):
+    def __init__(self, database_path: str, scratch: bool = False):
         self.database_path = database_path
+        self.scratch = scratch
+        # Set when the database can only be read, e.g. on read-only media
+        self.read_only = False
         self.connection = None
+        self._tls = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        # Flat-combining writes: callers queue entries and whichever thread
+        # holds the write lock commits everything queued in one transaction
+        self._write_queue = []
+        self._write_queue_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        
+        # Cached read results are keyed on PRAGMA data_version of a connection
+        # that never writes, which changes with every commit to the file:
+        # this manager's, a merge's, or another process's
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._summary_cache = None
+        self._search_cache = _ResultCache(QUERY_CACHE_ROWS)
+        self._archives_cache = _ResultCache(QUERY_CACHE_ROWS)
         self.init_database()
     
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new connection with the standard PRAGMAs applied
+        
+        Read-only connections go through a mode=ro URI so they never
+        take the write lock. On read-only media they are also opened
+        immutable, as SQLite could not create the WAL's shared-memory file.
+        """
+        if read_only:
+            uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+            if self.read_only:
+                uri += "&immutable=1"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            # Autocommit mode - write paths issue their own BEGIN/COMMIT
+            conn = sqlite3.connect(self.database_path, isolation_level=None,
+                                   check_same_thread=False)
+        conn.executescript(CONNECTION_PRAGMAS)
+        conn.create_function("REGEXP", 2, _regexp, deterministic=True)
+        if self.scratch and not read_only:
+            conn.executescript(SCRATCH_PRAGMAS)
+        return conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read-only connection, opening it on first use
+        
+        Reusing one connection per thread avoids reopening the database,
+        WAL and shared-memory files and re-warming the page cache on every
+        query.
+        """
+        conn = getattr(self._tls, 'reader', None)
+        if conn is None:
+            conn = self._connect(read_only=True)
+            conn.executescript(READER_PRAGMAS)
+            self._tls.reader = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _writer(self) -> sqlite3.Connection:
+        """Return this thread's write connection, opening it on first use
+        
+        sqlite3 keeps compiled statements per connection, so reusing the
+        connection lets repeated batches skip re-preparing the INSERTs.
+        """
+        conn = getattr(self._tls, 'writer', None)
+        if conn is None:
+            conn = self._connect()
+            self._tls.writer = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
     def init_database(self):
         """Initialize the database with required tables"""
-        self.connection = sqlite3.connect(self.database_path)
+        # Autocommit mode: transactions are managed explicitly by the write paths
+        self.connection = sqlite3.connect(self.database_path, isolation_level=None,
+                                          check_same_thread=False)
+        try:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+        except sqlite3.OperationalError as e:
+            if not _is_read_only_error(e):
+                raise
+            # Read-only media: every schema step below writes, so the
+            # database is opened read-only as it is and only searched
+            self.connection.close()
+            self._open_read_only()
+            return
+        self.connection.executescript(CONNECTION_PRAGMAS)
+        if self.scratch:
+            self.connection.executescript(SCRATCH_PRAGMAS)
         cursor = self.connection.cursor()
         
         # Create tables
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS zip_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER PRIMARY KEY,
                 drive_letter TEXT NOT NULL,
                 zip_file_name TEXT NOT NULL,
                 zip_file_path TEXT NOT NULL UNIQUE,
@@ -37,22 +353,12 @@ class DatabaseManager:
                 file_size INTEGER,
                 file_hash TEXT,
                 last_modified TIMESTAMP,
-                scan_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                scan_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                file_count INTEGER DEFAULT 0
             )
         ''')
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS file_contents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                zip_uuid TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_size INTEGER NOT NULL,
-                file_path_in_zip TEXT NOT NULL,
-                file_hash TEXT,
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (zip_uuid) REFERENCES zip_files (uuid)
-            )
-        ''')
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS file_contents ({FILE_CONTENTS_COLUMNS})')
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS scan_progress (
@@ -77,112 +383,546 @@ class DatabaseManager:
             )
         ''')
         
-        # Create indexes
+        self._upgrade_schema(cursor)
+        
+        # Scratch databases are bulk loaded and then merged with a sequential
+        # read, so their helper indexes and search mirror would cost every
+        # insert and never be used; the merge target maintains its own
+        if self.scratch:
+            self.fts_enabled = False
+        else:
+            self.finalize_indexes()
+        
+        logger.info(f"Database initialized at: {self.database_path}")
+    
+    def _open_read_only(self):
+        """Open a database that cannot be written, without touching its schema"""
+        logger.warning(f"Database {self.database_path} is read-only; opening it for searching only")
+        self.read_only = True
+        self.connection = self._connect(read_only=True)
+        cursor = self.connection.cursor()
+        cursor.execute("PRAGMA table_info(file_contents)")
+        if 'zip_id' not in {row[1] for row in cursor.fetchall()}:
+            raise sqlite3.OperationalError(
+                f"{self.database_path} was written by an older version and must be "
+                "opened writable once to be upgraded")
+        # The search mirror is only used if it was already built
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'file_contents_fts'")
+        self.fts_enabled = cursor.fetchone() is not None
+    
+    def finalize_indexes(self):
+        """Create the helper indexes and the search mirror if they are missing
+        
+        Done when the database is opened, except for scratch databases, which
+        skip them until this is called.
+        """
+        cursor = self.connection.cursor()
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_zip_files_drive ON zip_files(drive_letter)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_contents_zip_uuid ON file_contents(zip_uuid)')
+        # file_size rides along on the zip index so the summary's count and
+        # size sum read this narrow index instead of every file row
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_contents_zip_size ON file_contents(zip_id, file_size)')
+        cursor.execute('DROP INDEX IF EXISTS idx_file_contents_zip_id')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_contents_name ON file_contents(file_name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_file_contents_ext ON file_contents(ext)')
         
-        self.connection.commit()
-        logger.info(f"Database initialized at: {self.database_path}")
+        self.fts_enabled = self._init_search_index(cursor)
+    
+    def _upgrade_schema(self, cursor):
+        """Add columns missing from databases created by older versions"""
+        cursor.execute("PRAGMA table_info(zip_files)")
+        columns = {row[1] for row in cursor.fetchall()}
+        
+        if 'file_count' not in columns:
+            cursor.execute("ALTER TABLE zip_files ADD COLUMN file_count INTEGER DEFAULT 0")
+            cursor.execute('''
+                UPDATE zip_files SET file_count =
+                    (SELECT COUNT(*) FROM file_contents f WHERE f.zip_uuid = zip_files.uuid)
+            ''')
+        
+        cursor.execute("PRAGMA table_info(file_contents)")
+        content_columns = {row[1] for row in cursor.fetchall()}
+        if 'ext' not in content_columns:
+            cursor.execute("ALTER TABLE file_contents ADD COLUMN ext TEXT")
+            self._backfill_extensions(cursor)
+        
+        if 'zip_id' not in content_columns:
+            self._migrate_zip_ids(cursor)
+    
+    def _migrate_zip_ids(self, cursor):
+        """Rebuild file_contents keyed on zip_files.id instead of the zip UUID
+        
+        Row ids are kept. File rows whose zip no longer exists were never
+        returned by the joined queries and are not carried over. The search
+        mirror is dropped so that it is rebuilt over the new table.
+        """
+        columns = ', '.join(CONTENT_COLUMNS)
+        source_columns = ', '.join(f'f.{column}' for column in CONTENT_COLUMNS)
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.execute(f'CREATE TABLE file_contents_new ({FILE_CONTENTS_COLUMNS})')
+            cursor.execute(f'''
+                INSERT INTO file_contents_new (id, zip_id, {columns}, ext)
+                SELECT f.id, z.id, {source_columns}, f.ext
+                FROM file_contents f JOIN zip_files z ON z.uuid = f.zip_uuid
+            ''')
+            cursor.execute('DROP TABLE file_contents')
+            cursor.execute('ALTER TABLE file_contents_new RENAME TO file_contents')
+            cursor.execute('DROP TABLE IF EXISTS file_contents_fts')
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+    
+    def _backfill_extensions(self, cursor):
+        """Fill in file_contents.ext for rows written without it"""
+        cursor.execute("SELECT id, file_name FROM file_contents WHERE ext IS NULL")
+        rows = [(file_extension(name), row_id) for row_id, name in cursor.fetchall()]
+        if rows:
+            cursor.executemany("UPDATE file_contents SET ext = ? WHERE id = ?", rows)
+    
+    def _init_search_index(self, cursor) -> bool:
+        """Create the FTS5 trigram mirror of file_contents.file_name
+        
+        A trigram index answers LIKE '%pattern%' without scanning every row
+        and keeps LIKE's case-insensitive substring semantics. Returns False
+        when this SQLite build lacks FTS5 or the trigram tokenizer, in which
+        case searches use plain LIKE.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'file_contents_fts'")
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS file_contents_fts USING fts5(
+                    file_name, content='file_contents', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.info(f"Full-text search index unavailable, using LIKE scans: {e}")
+            return False
+        
+        # Keep the external-content index in sync with file_contents
+        cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS file_contents_fts_insert AFTER INSERT ON file_contents BEGIN
+                INSERT INTO file_contents_fts(rowid, file_name) VALUES (new.id, new.file_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS file_contents_fts_delete AFTER DELETE ON file_contents BEGIN
+                INSERT INTO file_contents_fts(file_contents_fts, rowid, file_name)
+                VALUES ('delete', old.id, old.file_name);
+            END;
+            CREATE TRIGGER IF NOT EXISTS file_contents_fts_update AFTER UPDATE OF file_name ON file_contents BEGIN
+                INSERT INTO file_contents_fts(file_contents_fts, rowid, file_name)
+                VALUES ('delete', old.id, old.file_name);
+                INSERT INTO file_contents_fts(rowid, file_name) VALUES (new.id, new.file_name);
+            END;
+        ''')
+        
+        if not exists:
+            # Index rows of databases created before the FTS table existed
+            cursor.execute("INSERT INTO file_contents_fts(file_contents_fts) VALUES ('rebuild')")
+        return True
     
     def insert_zip_data(self, zip_path: str, video_files: List[Tuple[str, int, str, Optional[str]]], 
-                       heartbeat_callback=None, drive_letter: str = None) -> str:
-        """Insert zip file and its video files into the database with thread safety"""
+                       heartbeat_callback=None, drive_letter: str = None,
+                       metadata: Optional[Tuple[int, str]] = None) -> str:
+        """Insert zip file and its video files into the database with thread safety
+        
+        Inside a batch() block the zip is buffered and written together with
+        the other zips of the batch; the UUID it will be stored under is
+        returned immediately. metadata is the zip_metadata() of a stat the
+        caller already made; without it the zip is stat'ed here.
+        """
         if not video_files:
             return None
         
-        if heartbeat_callback:
-            heartbeat_callback("Starting database insertion...")
+        pending = getattr(self._tls, 'pending', None)
+        if pending is None:
+            entries = [(generate_uuids(1)[0], zip_path, video_files, drive_letter)]
+            self._write_zips(entries, heartbeat_callback, [metadata])
+            return entries[0][0]
+        
+        uuid_pool = getattr(self._tls, 'uuid_pool', None)
+        if not uuid_pool:
+            uuid_pool = self._tls.uuid_pool = generate_uuids(UUID_POOL_SIZE)
+        zip_uuid = uuid_pool.pop()
+        pending.append((zip_uuid, zip_path, video_files, drive_letter))
+        self._tls.pending_metadata.append(metadata)
+        self._tls.pending_rows += len(video_files)
+        self._tls.heartbeat_callback = heartbeat_callback
+        if self._tls.pending_rows >= self._tls.max_rows:
+            self._flush_pending()
+        return zip_uuid
+    
+    def insert_many_zips(self, zips: List[Tuple[str, List[Tuple[str, int, str, Optional[str]]], Optional[str]]],
+                         heartbeat_callback=None) -> List[str]:
+        """Insert several zip files and their video files in a single transaction
+        
+        Args:
+            zips: List of (zip_path, video_files, drive_letter) tuples
+            heartbeat_callback: Optional callback for progress updates
+            
+        Returns:
+            List of UUIDs assigned to the inserted zip files, in input order
+        """
+        zips = [z for z in zips if z[1]]
+        entries = [(zip_uuid, zip_path, video_files, drive_letter)
+                   for zip_uuid, (zip_path, video_files, drive_letter) in zip(generate_uuids(len(zips)), zips)]
+        self._write_zips(entries, heartbeat_callback)
+        return [entry[0] for entry in entries]
+    
+    @contextmanager
+    def batch(self, max_rows: int = 1000, on_error=None):
+        """Buffer insert_zip_data calls made by this thread
         
-        zip_uuid = str(uuid.uuid4())
-        zip_file_name = os.path.basename(zip_path)
+        Buffered zips are written in one transaction whenever max_rows file
+        records have accumulated, and when the block exits. This amortizes
+        the commit cost over many small zip files.
         
-        # Get ZIP file metadata
-        zip_file_size = 0
-        zip_last_modified = None
+        With on_error, a zip that cannot be written is left out and reported
+        as on_error(zip_path, video_files, error) instead of failing the
+        whole batch.
+        """
+        if getattr(self._tls, 'pending', None) is not None:
+            # Already batching on this thread - the outer block flushes
+            yield
+            return
         
+        self._tls.pending = []
+        self._tls.pending_metadata = []
+        self._tls.pending_rows = 0
+        self._tls.max_rows = max_rows
+        self._tls.heartbeat_callback = None
+        self._tls.on_error = on_error
+        try:
+            yield
+        finally:
+            try:
+                self._flush_pending()
+            finally:
+                self._tls.pending = None
+    
+    @contextmanager
+    def transaction(self):
+        """Write everything this thread inserts inside the block in one transaction
+        
+        The commit, and with it the fsync, happens once when the block exits
+        instead of once per batch. Each batch still runs in a savepoint, so
+        a failed batch is rolled back on its own. Writes from other threads
+        wait until the block exits; merge_databases() and optimize() raise
+        if called inside it, as they would wait for it themselves.
+        """
+        if getattr(self._tls, 'in_transaction', False):
+            yield
+            return
+        
+        with self._write_lock:
+            conn = self._writer()
+            conn.execute('BEGIN IMMEDIATE')
+            self._tls.in_transaction = True
+            try:
+                yield
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._tls.in_transaction = False
+                self._invalidate_caches()
+    
+    def _check_outside_transaction(self, operation: str):
+        """Raise if this thread is inside transaction(), whose write lock it would wait for"""
+        if getattr(self._tls, 'in_transaction', False):
+            raise sqlite3.ProgrammingError(f"{operation}() cannot be called inside transaction()")
+    
+    def _flush_pending(self):
+        """Write the zips buffered by batch() on this thread"""
+        entries = self._tls.pending
+        if not entries:
+            return
+        
+        metadata = self._tls.pending_metadata
+        self._tls.pending = []
+        self._tls.pending_metadata = []
+        self._tls.pending_rows = 0
+        self._write_zips(entries, self._tls.heartbeat_callback, metadata, self._tls.on_error)
+    
+    def _write_zips(self, entries: List[Tuple[str, str, List[Tuple[str, int, str, Optional[str]]], Optional[str]]],
+                    heartbeat_callback=None, metadata: Optional[list] = None, on_error=None):
+        """Write (zip_uuid, zip_path, video_files, drive_letter) entries and wait for the commit
+        
+        metadata optionally holds each entry's zip_metadata(), None where the
+        zip still has to be stat'ed. With on_error, entries that fail are
+        retried one at a time and each one that still fails is passed to
+        on_error(zip_path, video_files, error) instead of raising.
+        
+        Threads that arrive while another thread is writing queue their
+        entries; the next thread to take the write lock commits the whole
+        queue at once. Each caller still returns only after its own entries
+        are committed and sees its own errors.
+        """
+        if not entries:
+            return
+        
+        # stat() the zips before queuing so no file system calls happen while
+        # the write lock or the SQLite transaction is held
+        if metadata is None:
+            metadata = [None] * len(entries)
+        metadata = [m if m is not None else self._zip_metadata(entry[1])
+                    for entry, m in zip(entries, metadata)]
+        if on_error is not None:
+            try:
+                self._write_zips(entries, heartbeat_callback, metadata)
+            except sqlite3.Error:
+                # A failed write is rolled back (inside transaction() only its
+                # savepoint), so retrying the zips alone loses just the bad one
+                for entry, m in zip(entries, metadata):
+                    try:
+                        self._write_zips([entry], heartbeat_callback, [m])
+                    except sqlite3.Error as e:
+                        on_error(entry[1], entry[2], e)
+            return
+        
+        if getattr(self._tls, 'in_transaction', False):
+            # transaction() already holds the write lock for this thread
+            self._insert_entries(entries, metadata, heartbeat_callback)
+            return
+        
+        pending = _PendingWrite(entries, metadata, heartbeat_callback)
+        with self._write_queue_lock:
+            self._write_queue.append(pending)
+        
+        with self._write_lock:
+            if not pending.done:
+                with self._write_queue_lock:
+                    queued, self._write_queue = self._write_queue, []
+                try:
+                    self._commit_pending(queued)
+                finally:
+                    # Never leave a waiting caller believing it was written
+                    for p in queued:
+                        if not p.done:
+                            p.error = sqlite3.OperationalError("Write interrupted before commit")
+                            p.done = True
+        
+        if pending.error is not None:
+            raise pending.error
+    
+    def _commit_pending(self, queued: List[_PendingWrite]):
+        """Commit queued writes together, falling back to one at a time on error"""
+        if len(queued) > 1:
+            callbacks = [p.heartbeat_callback for p in queued if p.heartbeat_callback]
+            
+            def combined_heartbeat(message):
+                for callback in callbacks:
+                    callback(message)
+            
+            try:
+                self._insert_entries([e for p in queued for e in p.entries],
+                                     [m for p in queued for m in p.metadata],
+                                     combined_heartbeat if callbacks else None)
+                for p in queued:
+                    p.done = True
+                return
+            except sqlite3.Error:
+                # Keep one caller's bad entry from failing the others
+                pass
+        
+        for p in queued:
+            try:
+                self._insert_entries(p.entries, p.metadata, p.heartbeat_callback)
+            except Exception as e:
+                p.error = e
+            p.done = True
+    
+    def _zip_metadata(self, zip_path: str) -> Tuple[int, Optional[str]]:
+        """Return (file_size, last_modified) for a zip, or (0, None) if it cannot be read"""
         try:
             stat_info = os.stat(zip_path)
-            zip_file_size = stat_info.st_size
-            zip_last_modified = datetime.fromtimestamp(stat_info.st_mtime)
         except OSError as e:
             logger.warning(f"Could not get metadata for {zip_path}: {e}")
+            return 0, None
+        return zip_metadata(stat_info)
+    
+    def _insert_entries(self, entries, metadata, heartbeat_callback=None):
+        """Insert (zip_uuid, zip_path, video_files, drive_letter) entries in one transaction
+        
+        metadata holds the (file_size, last_modified) of each entry's zip.
+        Inside transaction() the entries go into a savepoint instead.
+        """
+        if heartbeat_callback:
+            heartbeat_callback("Starting database insertion...")
         
-        # Use thread-safe connection
-        conn = sqlite3.connect(self.database_path)
+        # Use this thread's cached write connection
+        conn = self._writer()
         cursor = conn.cursor()
+        nested = conn.in_transaction
         
         try:
             if heartbeat_callback:
                 heartbeat_callback("Inserting ZIP metadata...")
             
-            # Insert zip file record
-            cursor.execute('''
-                INSERT INTO zip_files (drive_letter, zip_file_name, zip_file_path, uuid, 
-                                     file_size, file_hash, last_modified, scan_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (drive_letter or "", zip_file_name, zip_path, zip_uuid, 
-                  zip_file_size, None, zip_last_modified, datetime.now()))
+            cursor.execute('SAVEPOINT insert_entries' if nested else 'BEGIN IMMEDIATE')
+            # One timestamp for the whole batch, formatted once rather than
+            # adapted again for every bound row
+            now = datetime.now().isoformat(" ")
+            with_hashes = any(f[3] is not None for entry in entries for f in entry[2])
+            if not self.scratch:
+                # Scratch databases start empty, so they have nothing to replace
+                zip_paths = [(entry[1],) for entry in entries]
+                cursor.executemany(DELETE_ZIP_CONTENTS_SQL, zip_paths)
+                cursor.executemany(DELETE_ZIP_SQL, zip_paths)
+            first_id = cursor.execute(NEXT_ZIP_ID_SQL).fetchone()[0]
+            zip_ids = range(first_id, first_id + len(entries))
             
-            if heartbeat_callback:
-                heartbeat_callback(f"Inserting {len(video_files)} file records...")
+            # Batch insert the zip records of all entries at once
+            insert_rows(cursor, INSERT_ZIP_SQL, 9, (
+                (zip_id, drive_letter or "", os.path.basename(zip_path), zip_path, zip_uuid,
+                 zip_file_size, zip_last_modified, now, len(video_files))
+                for zip_id, (zip_uuid, zip_path, video_files, drive_letter), (zip_file_size, zip_last_modified)
+                in zip(zip_ids, entries, metadata)
+            ))
             
-            # Batch insert video files
-            video_data = []
-            for file_name, file_size, file_path_in_zip, file_hash in video_files:
-                video_data.append((zip_uuid, file_name, file_size, file_path_in_zip, file_hash, datetime.now()))
+            if heartbeat_callback:
+                file_total = sum(len(entry[2]) for entry in entries)
+                heartbeat_callback(f"Inserting {file_total} file records...")
             
-            cursor.executemany('''
-                INSERT INTO file_contents (zip_uuid, file_name, file_size, file_path_in_zip, file_hash, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', video_data)
+            # Then the video files of all zips, generated a chunk at a time
+            # rather than collected into one list first
+            if with_hashes:
+                video_rows = ((zip_id, file_name, file_size, file_path_in_zip, file_hash, now,
+                               file_extension(file_name))
+                              for zip_id, entry in zip(zip_ids, entries)
+                              for file_name, file_size, file_path_in_zip, file_hash in entry[2])
+            else:
+                video_rows = ((zip_id, file_name, file_size, file_path_in_zip, now,
+                               file_extension(file_name))
+                              for zip_id, entry in zip(zip_ids, entries)
+                              for file_name, file_size, file_path_in_zip, _ in entry[2])
+            if with_hashes:
+                insert_rows(cursor, INSERT_CONTENT_SQL, 7, video_rows)
+            else:
+                insert_rows(cursor, INSERT_CONTENT_NO_HASH_SQL, 6, video_rows)
             
             if heartbeat_callback:
                 heartbeat_callback("Committing transaction...")
             
-            conn.commit()
-            logger.info(f"Inserted {len(video_files)} video files from {zip_file_name}")
-            return zip_uuid
-        finally:
-            conn.close()
+            if nested:
+                cursor.execute('RELEASE insert_entries')
+            else:
+                conn.commit()
+            self._invalidate_caches()
+            for _, zip_path, video_files, _ in entries:
+                logger.info(f"Inserted {len(video_files)} video files from {os.path.basename(zip_path)}")
+        except Exception:
+            if nested:
+                conn.execute('ROLLBACK TO insert_entries')
+                conn.execute('RELEASE insert_entries')
+            else:
+                conn.rollback()
+            raise
+    
+    def _invalidate_caches(self):
+        """Drop cached read results after a commit
+        
+        The data version would catch the commit too; clearing right away
+        just frees the memory sooner.
+        """
+        self._summary_cache = None
+        self._search_cache.clear()
+        self._archives_cache.clear()
+    
+    def _data_version(self) -> int:
+        """Return PRAGMA data_version, which changes whenever the database is committed to"""
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = self._connect(read_only=True)
+                with self._connections_lock:
+                    self._connections.append(self._version_conn)
+            return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
     
     def get_database_summary(self):
-        """Get current database summary with thread-safe connection"""
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
+        """Get current database summary with thread-safe connection
         
-        try:
-            cursor.execute("SELECT COUNT(*) FROM zip_files")
-            zip_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM file_contents")
-            video_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT SUM(file_size) FROM file_contents")
-            total_size = cursor.fetchone()[0] or 0
-            
-            cursor.execute("SELECT COUNT(DISTINCT drive_letter) FROM zip_files")
-            drive_count = cursor.fetchone()[0]
-            
-            return {
-                'drives': drive_count,
-                'zip_files': zip_count,
-                'video_files': video_count,
-                'total_size_gb': total_size / (1024**3)
-            }
-        finally:
-            conn.close()
+        The result is reused until the database is written to, by this
+        manager or any other connection.
+        """
+        version = self._data_version()
+        cached = self._summary_cache
+        if cached and cached[0] == version:
+            return dict(cached[1])
+        
+        summary = self._count_summary()
+        self._summary_cache = (version, summary)
+        return dict(summary)
+    
+    def _count_summary(self):
+        """Count drives, zips, videos and total size"""
+        cursor = self._reader().cursor()
+        
+        # One statement: a single pass over each table, and the file count
+        # comes out of the same file_contents scan the size sum needs
+        cursor.execute('''
+            SELECT z.zip_count, z.drive_count, f.video_count, f.total_size
+            FROM (SELECT COUNT(*) AS zip_count, COUNT(DISTINCT drive_letter) AS drive_count
+                  FROM zip_files) z,
+                 (SELECT COUNT(*) AS video_count, COALESCE(SUM(file_size), 0) AS total_size
+                  FROM file_contents) f
+        ''')
+        zip_count, drive_count, video_count, total_size = cursor.fetchone()
+        
+        return {
+            'drives': drive_count,
+            'zip_files': zip_count,
+            'video_files': video_count,
+            'total_size_gb': total_size / (1024**3)
+        }
     
     def search_files(self, pattern: str, regex: bool = False, min_size: int = None, 
                     max_size: int = None, file_types: List[str] = None):
-        """Search for files matching pattern"""
-        cursor = self.connection.cursor()
+        """Search for files matching pattern
+        
+        Results are cached per argument set until the database changes.
+        """
+        key = (pattern, regex, min_size, max_size, tuple(file_types) if file_types else None)
+        return list(self._search_cache.get(self._data_version(), key,
+                                           functools.partial(self._search_files, key)))
+    
+    def _search_files(self, key: tuple):
+        """Run the search query for a frozen search_files argument set"""
+        return list(self.iter_search_files(*key))
+    
+    def iter_search_files(self, pattern: str, regex: bool = False, min_size: int = None,
+                          max_size: int = None, file_types: List[str] = None
+                          ) -> Iterator[Tuple[str, str, str, str, int, str]]:
+        """Yield search results row by row instead of building a list
+        
+        The read snapshot stays open until the iterator is exhausted.
+        """
+        query, params = self._search_query('''
+            z.drive_letter, z.zip_file_name, z.zip_file_path,
+            f.file_name, f.file_size, f.file_path_in_zip
+        ''', pattern, regex, min_size, max_size, file_types)
+        
+        cursor = self._reader().cursor()
+        cursor.execute(query + " ORDER BY f.file_size DESC", params)
+        yield from cursor
+    
+    def count_search_results(self, pattern: str, regex: bool = False, min_size: int = None,
+                             max_size: int = None, file_types: List[str] = None) -> int:
+        """Count the rows search_files would return without fetching them"""
+        query, params = self._search_query('COUNT(*)', pattern, regex, min_size, max_size, file_types)
         
-        base_query = '''
-            SELECT z.drive_letter, z.zip_file_name, z.zip_file_path, 
-                   f.file_name, f.file_size, f.file_path_in_zip
+        cursor = self._reader().cursor()
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
+    
+    def _search_query(self, columns: str, pattern: str, regex: bool, min_size: Optional[int],
+                      max_size: Optional[int], file_types: Optional[List[str]]) -> Tuple[str, list]:
+        """Build the search SELECT for the given result columns and filters"""
+        base_query = f'''
+            SELECT {columns}
             FROM zip_files z
-            JOIN file_contents f ON z.uuid = f.zip_uuid
+            JOIN file_contents f ON z.id = f.zip_id
             WHERE 1=1
         '''
         
@@ -191,6 +931,13 @@ class DatabaseManager:
         if regex:
             base_query += " AND f.file_name REGEXP ?"
             params.append(pattern)
+        elif not pattern:
+            # '%%' matches every name
+            pass
+        elif self.fts_enabled and TRIGRAM_RUN.search(pattern):
+            # Same LIKE semantics, answered from the trigram index
+            base_query += " AND f.id IN (SELECT rowid FROM file_contents_fts WHERE file_name LIKE ?)"
+            params.append(f"%{pattern}%")
         else:
             base_query += " AND f.file_name LIKE ?"
             params.append(f"%{pattern}%")
@@ -204,33 +951,29 @@ class DatabaseManager:
             params.append(max_size)
         
         if file_types:
-            type_conditions = []
-            for file_type in file_types:
-                type_conditions.append("f.file_name LIKE ?")
-                params.append(f"%.{file_type}")
-            base_query += f" AND ({' OR '.join(type_conditions)})"
+            base_query += f" AND f.ext IN ({', '.join('?' * len(file_types))})"
+            params.extend(file_type.lstrip('.').lower() for file_type in file_types)
         
-        base_query += " ORDER BY f.file_size DESC"
-        
-        cursor.execute(base_query, params)
-        return cursor.fetchall()
+        return base_query, params
     
-    def list_all_videos(self, limit: int = None) -> List[Tuple[str, str, int, str]]:
-        """List all video files in the database"""
-        cursor = self.connection.cursor()
+    def list_all_videos(self, limit: int = None) -> Iterator[Tuple[str, str, int, str]]:
+        """Yield all video files in the database, ordered by name"""
+        cursor = self._reader().cursor()
         
         query = '''
             SELECT f.file_name, z.zip_file_name, f.file_size, z.drive_letter
             FROM file_contents f
-            JOIN zip_files z ON f.zip_uuid = z.uuid
+            JOIN zip_files z ON f.zip_id = z.id
             ORDER BY f.file_name
         '''
+        params = ()
         
         if limit:
-            query += f" LIMIT {limit}"
+            query += " LIMIT ?"
+            params = (limit,)
         
-        cursor.execute(query)
-        return cursor.fetchall()
+        cursor.execute(query, params)
+        yield from cursor
     
     def get_file_extraction_info(self, file_name: str) -> List[Tuple[str, str, str, int]]:
         """Get extraction information for a specific file
@@ -241,19 +984,15 @@ class DatabaseManager:
         Returns:
             List of tuples: (zip_file_path, file_path_in_zip, file_name, file_size)
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size
-                FROM file_contents f
-                JOIN zip_files z ON f.zip_uuid = z.uuid
-                WHERE f.file_name LIKE ?
-                ORDER BY f.file_size DESC
-            ''', (f'%{file_name}%',))
-            return cursor.fetchall()
-        finally:
-            conn.close()
+        cursor = self._reader().cursor()
+        cursor.execute('''
+            SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size
+            FROM file_contents f
+            JOIN zip_files z ON f.zip_id = z.id
+            WHERE f.file_name LIKE ?
+            ORDER BY f.file_size DESC
+        ''', (f'%{file_name}%',))
+        return cursor.fetchall()
     
     def get_file_by_uuid(self, zip_uuid: str, file_name: str = None) -> List[Tuple[str, str, str, int, str]]:
         """Get file extraction information by ZIP UUID
@@ -265,30 +1004,26 @@ class DatabaseManager:
         Returns:
             List of tuples: (zip_file_path, file_path_in_zip, file_name, file_size, zip_uuid)
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        try:
-            if file_name:
-                # Get specific file from specific ZIP
-                cursor.execute('''
-                    SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size, z.uuid
-                    FROM file_contents f
-                    JOIN zip_files z ON f.zip_uuid = z.uuid
-                    WHERE z.uuid = ? AND f.file_name LIKE ?
-                    ORDER BY f.file_size DESC
-                ''', (zip_uuid, f'%{file_name}%'))
-            else:
-                # Get all files from specific ZIP
-                cursor.execute('''
-                    SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size, z.uuid
-                    FROM file_contents f
-                    JOIN zip_files z ON f.zip_uuid = z.uuid
-                    WHERE z.uuid = ?
-                    ORDER BY f.file_name
-                ''', (zip_uuid,))
-            return cursor.fetchall()
-        finally:
-            conn.close()
+        cursor = self._reader().cursor()
+        if file_name:
+            # Get specific file from specific ZIP
+            cursor.execute('''
+                SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size, z.uuid
+                FROM file_contents f
+                JOIN zip_files z ON f.zip_id = z.id
+                WHERE z.uuid = ? AND f.file_name LIKE ?
+                ORDER BY f.file_size DESC
+            ''', (zip_uuid, f'%{file_name}%'))
+        else:
+            # Get all files from specific ZIP
+            cursor.execute('''
+                SELECT z.zip_file_path, f.file_path_in_zip, f.file_name, f.file_size, z.uuid
+                FROM file_contents f
+                JOIN zip_files z ON f.zip_id = z.id
+                WHERE z.uuid = ?
+                ORDER BY f.file_name
+            ''', (zip_uuid,))
+        return cursor.fetchall()
     
     def get_zip_info_by_uuid(self, zip_uuid: str) -> Optional[Tuple[str, str, str, int]]:
         """Get ZIP file information by UUID
@@ -299,19 +1034,24 @@ class DatabaseManager:
         Returns:
             Tuple: (zip_file_path, zip_file_name, drive_letter, file_count) or None if not found
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT z.zip_file_path, z.zip_file_name, z.drive_letter,
-                       (SELECT COUNT(*) FROM file_contents f WHERE f.zip_uuid = z.uuid) as file_count
-                FROM zip_files z
-                WHERE z.uuid = ?
-            ''', (zip_uuid,))
-            result = cursor.fetchone()
-            return result
-        finally:
-            conn.close()
+        cursor = self._reader().cursor()
+        cursor.execute('''
+            SELECT z.zip_file_path, z.zip_file_name, z.drive_letter, z.file_count
+            FROM zip_files z
+            WHERE z.uuid = ?
+        ''', (zip_uuid,))
+        result = cursor.fetchone()
+        return result
+    
+    def get_scanned_zips(self) -> Dict[str, Tuple[int, Optional[str]]]:
+        """Map each stored zip's path to its (file_size, last_modified)
+        
+        Compared with zip_metadata() of the file on disk, this tells a
+        rescan which zips are unchanged since they were stored.
+        """
+        cursor = self._reader().cursor()
+        cursor.execute('SELECT zip_file_path, file_size, last_modified FROM zip_files')
+        return {path: (file_size, last_modified) for path, file_size, last_modified in cursor}
     
     def list_zip_archives(self, limit: int = None) -> List[Tuple[str, str, str, int, str]]:
         """List all ZIP archives with their UUIDs
@@ -322,92 +1062,194 @@ class DatabaseManager:
         Returns:
             List of tuples: (zip_file_name, drive_letter, uuid, file_count, zip_file_path)
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        try:
-            query = '''
-                SELECT z.zip_file_name, z.drive_letter, z.uuid,
-                       (SELECT COUNT(*) FROM file_contents f WHERE f.zip_uuid = z.uuid) as file_count,
-                       z.zip_file_path
-                FROM zip_files z
-                ORDER BY z.zip_file_name
-            '''
-            
-            if limit:
-                query += f" LIMIT {limit}"
-            
-            cursor.execute(query)
-            return cursor.fetchall()
-        finally:
-            conn.close()
+        return list(self._archives_cache.get(self._data_version(), limit,
+                                             functools.partial(self._list_zip_archives, limit)))
     
-    def merge_databases(self, source_db_paths: List[str], progress_callback=None):
-        """Merge multiple database files into this database"""
+    def _list_zip_archives(self, limit: Optional[int]):
+        """Run the archive listing query"""
+        cursor = self._reader().cursor()
+        query = '''
+            SELECT z.zip_file_name, z.drive_letter, z.uuid, z.file_count, z.zip_file_path
+            FROM zip_files z
+            ORDER BY z.zip_file_name
+        '''
+        params = ()
+        
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    
+    def merge_databases(self, source_db_paths: List[str], progress_callback=None,
+                        optimize: bool = True):
+        """Merge multiple database files into this database
+        
+        Sources are ATTACHed several at a time, up to SQLite's attached
+        database limit, and each group is copied with INSERT ... SELECT in a
+        single transaction so rows never pass through Python and the commit
+        cost is paid once per group. Row ids are reassigned by this database.
+        A source zip stored here with a different size or modification time
+        replaces the stored one. Other zips already present (same path or
+        UUID) are skipped together with their file rows, so re-merging a
+        rescan adds no duplicates.
+        
+        Each group is merged holding the write lock, so inserts through this
+        manager wait for it. Pass optimize=False when more merges follow, and
+        call optimize() once after the last of them.
+        """
+        self._check_outside_transaction("merge_databases")
         if not source_db_paths:
             return
         
         if progress_callback:
             progress_callback(f"Merging {len(source_db_paths)} database files...")
         
-        conn = sqlite3.connect(self.database_path)
+        sources = []
+        for i, source_db_path in enumerate(source_db_paths):
+            if os.path.exists(source_db_path):
+                sources.append((i, source_db_path))
+            else:
+                logger.warning(f"Source database not found: {source_db_path}")
+        
+        conn = self._writer()
         cursor = conn.cursor()
+        group_size = self._attach_limit(conn)
         
         try:
-            for i, source_db_path in enumerate(source_db_paths):
-                if not os.path.exists(source_db_path):
-                    logger.warning(f"Source database not found: {source_db_path}")
-                    continue
-                
-                if progress_callback:
-                    progress_callback(f"Merging database {i+1}/{len(source_db_paths)}: {os.path.basename(source_db_path)}")
-                
-                # Use a separate connection to read from source database
-                source_conn = sqlite3.connect(source_db_path)
-                source_cursor = source_conn.cursor()
+            for start in range(0, len(sources), group_size):
+                group = sources[start:start + group_size]
+                aliases = []
                 
-                try:
-                    # Read zip_files data from source
-                    source_cursor.execute("SELECT * FROM zip_files")
-                    zip_files_data = source_cursor.fetchall()
-                    
-                    # Insert into main database
-                    cursor.executemany("""
-                        INSERT OR IGNORE INTO zip_files 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, zip_files_data)
-                    
-                    # Read file_contents data from source
-                    source_cursor.execute("SELECT * FROM file_contents")
-                    file_contents_data = source_cursor.fetchall()
-                    
-                    # Insert into main database
-                    cursor.executemany("""
-                        INSERT OR IGNORE INTO file_contents 
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, file_contents_data)
-                    
-                finally:
-                    source_conn.close()
+                # Writers on other threads wait, as they would for transaction(),
+                # instead of racing the merge for SQLite's lock
+                with self._write_lock:
+                    # SQLite cannot DETACH inside a transaction, so the group is
+                    # attached up front and detached after its commit
+                    try:
+                        for i, source_db_path in group:
+                            alias = f"src{len(aliases)}"
+                            cursor.execute(f"ATTACH DATABASE ? AS {alias}", (source_db_path,))
+                            aliases.append(alias)
+                        
+                        cursor.execute('BEGIN IMMEDIATE')
+                        for alias, (i, source_db_path) in zip(aliases, group):
+                            if progress_callback:
+                                progress_callback(f"Merging database {i+1}/{len(source_db_paths)}: {os.path.basename(source_db_path)}")
+                            self._copy_attached(cursor, alias)
+                        conn.commit()
+                        self._invalidate_caches()
+                    except Exception:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        raise
+                    finally:
+                        for alias in aliases:
+                            cursor.execute(f"DETACH DATABASE {alias}")
                 
                 if progress_callback:
-                    progress_callback(f"Merged {os.path.basename(source_db_path)} successfully")
+                    for i, source_db_path in group:
+                        progress_callback(f"Merged {os.path.basename(source_db_path)} successfully")
             
-            conn.commit()
+            # Quiescent point: refresh planner stats and fold the WAL back in
+            if optimize:
+                self._optimize(conn)
             
             if progress_callback:
                 progress_callback("Database merge complete!")
                 
         except Exception as e:
-            conn.rollback()
             logger.error(f"Error merging databases: {e}")
             raise
+    
+    def _attach_limit(self, conn: sqlite3.Connection) -> int:
+        """Number of databases that can be attached at once alongside main"""
+        if hasattr(conn, 'getlimit'):
+            return max(1, conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED))
+        return 10  # SQLite's compiled-in default
+    
+    def _copy_attached(self, cursor, alias: str):
+        """Copy the new and changed zips of an attached source database and their file rows"""
+        cursor.execute(f"PRAGMA {alias}.table_info(zip_files)")
+        if any(row[1] == 'file_count' for row in cursor.fetchall()):
+            file_count = 'file_count'
+        else:
+            file_count = SOURCE_FILE_COUNT.format(src=alias)
+        cursor.execute(f"PRAGMA {alias}.table_info(file_contents)")
+        source_columns = {row[1] for row in cursor.fetchall()}
+        ext = 'f.ext' if 'ext' in source_columns else 'NULL'
+        # Sources from before zip ids point at their zips by UUID
+        zip_key, file_key = ('id', 'zip_id') if 'zip_id' in source_columns else ('uuid', 'zip_uuid')
+        new_zip = NEW_SOURCE_ZIP.format(src=alias)
+        columns = ', '.join(CONTENT_COLUMNS)
+        file_columns = ', '.join(f'f.{column}' for column in CONTENT_COLUMNS)
+        
+        # Zips rescanned because they changed on disk replace their stored
+        # rows, which then no longer block the copy below
+        cursor.execute(f"""
+            CREATE TEMP TABLE stale_zips AS
+            SELECT m.id FROM main.zip_files m JOIN {alias}.zip_files s ON s.zip_file_path = m.zip_file_path
+            WHERE s.file_size IS NOT m.file_size OR s.last_modified IS NOT m.last_modified
+        """)
+        try:
+            cursor.execute("DELETE FROM main.file_contents WHERE zip_id IN (SELECT id FROM temp.stale_zips)")
+            cursor.execute("DELETE FROM main.zip_files WHERE id IN (SELECT id FROM temp.stale_zips)")
         finally:
-            conn.close()
+            cursor.execute("DROP TABLE temp.stale_zips")
+        
+        # Pick the new zips before copying any, then copy them so they get
+        # their ids here, and give their file rows those ids via the UUID
+        cursor.execute("CREATE TEMP TABLE merge_zips (source_key PRIMARY KEY, uuid TEXT NOT NULL)")
+        try:
+            cursor.execute(f"""
+                INSERT INTO temp.merge_zips
+                SELECT {zip_key}, uuid FROM {alias}.zip_files WHERE {new_zip}
+            """)
+            cursor.execute(f"""
+                INSERT INTO zip_files ({ZIP_COLUMNS}, file_count)
+                SELECT {ZIP_COLUMNS}, {file_count} FROM {alias}.zip_files
+                WHERE uuid IN (SELECT uuid FROM temp.merge_zips)
+            """)
+            cursor.execute(f"""
+                INSERT INTO file_contents (zip_id, {columns}, ext)
+                SELECT m.id, {file_columns}, {ext}
+                FROM {alias}.file_contents f
+                JOIN temp.merge_zips n ON n.source_key = f.{file_key}
+                JOIN main.zip_files m ON m.uuid = n.uuid
+            """)
+        finally:
+            cursor.execute("DROP TABLE temp.merge_zips")
+        if ext == 'NULL':
+            self._backfill_extensions(cursor)
+    
+    def optimize(self):
+        """Refresh planner statistics and checkpoint the WAL"""
+        self._check_outside_transaction("optimize")
+        with self._write_lock:
+            self._optimize(self._writer())
+    
+    def _optimize(self, conn: sqlite3.Connection):
+        """Run PRAGMA optimize and truncate the WAL so later opens start clean"""
+        try:
+            conn.execute("PRAGMA optimize")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Skipped database optimize: {e}")
     
     def close(self):
         """Close database connection with thread safety"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._tls.reader = None
+        self._tls.writer = None
+        self._version_conn = None
+        
         if self.connection:
             try:
+                self._optimize(self.connection)
                 self.connection.close()
             except sqlite3.ProgrammingError:
                 # Connection was created in a different thread, ignore the error
@@ -5,15 +5,68 @@ Refactored from zip_scanner.py to eliminate code duplication
 """
 
 import os
+import sys
 import time
+import queue
+import struct
+import functools
+import itertools
+import contextlib
+import threading
+import multiprocessing
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from typing import List, Tuple, Optional, Callable, Iterator, NamedTuple
 from colorama import Fore, Style
 
-from database import DatabaseManager
+from database import DatabaseManager, zip_metadata
 from scanner import DriveScanner, ZipFileScanner
-from progress import ProgressDisplay
+from progress import ProgressDisplay, StatusReporter, console
 
+# Bytes read from the end of the next zip while the current one is scanned:
+# enough for the end-of-central-directory record plus a maximal comment.
+# The central directory it points to is read too, up to ZIP_PREFETCH_LIMIT
+ZIP_TAIL_PREFETCH = 64 * 1024
+ZIP_PREFETCH_LIMIT = 16 * 1024 * 1024
+
+# Minimum seconds between per-drive progress updates; the last zip always reports
+PROGRESS_INTERVAL = 0.1
+
+# Finished thread databases allowed to wait for the merger before result
+# collection blocks, so a slow merge pushes back instead of piling up
+MERGE_QUEUE_SIZE = 4
+# Seconds a full merge queue is waited on before checking the merger is alive
+MERGE_QUEUE_TIMEOUT = 1.0
+
+class ZipEntry(NamedTuple):
+    """A zip file found on a drive, with its name and size when the listing provided them
+    
+    metadata is the zip's (file_size, last_modified) as stored in zip_files,
+    kept from whichever stat() of the zip came first so it is not repeated.
+    """
+    path: str
+    name: Optional[str] = None
+    size: Optional[int] = None
+    metadata: Optional[Tuple[int, str]] = None
+
+
+# Scanner of a scan worker process, created once by _init_scan_worker
+_worker_scanner = None
+
+
+def _init_scan_worker(config: dict):
+    """Build the ZipFileScanner used by this worker process"""
+    global _worker_scanner
+    _worker_scanner = ZipFileScanner(config)
+
+
+def _scan_zip_worker(zip_path: str, all_files: bool) -> List[Tuple[str, int, str, Optional[str]]]:
+    """Scan one zip in a worker process; progress messages stay in the worker"""
+    return _worker_scanner.scan_zip_for_videos(zip_path, all_files)
+
+
+# Colors cycled across drives so each drive's output is distinguishable
+_DRIVE_COLORS = (Fore.GREEN, Fore.BLUE, Fore.MAGENTA, Fore.CYAN, Fore.YELLOW)
 
 class DriveProcessingResult:
     """Data class to hold drive processing results"""
@@ -44,11 +97,49 @@ class BaseDriveProcessor(ABC):
         self.drive_scanner = DriveScanner(config)
         self.zip_scanner = ZipFileScanner(config)
         self.progress = ProgressDisplay()
+        self.status = StatusReporter()
         
         # Configuration flags
         self.root_folders_only = config.get('google_takeout_mode', True)
         self.all_files_mode = config.get('scan_all_files', False)
         self.quiet_mode = config.get('quiet_mode', False)
+        self.batch_size = config.get('batch_size', 1000)
+        self.scan_processes = config.get('scan_processes', 0)
+        self._scan_pool = None
+        self._drive_index = {}
+        self._scanned_zips = {}
+    
+    def _index_drives(self, drives: List[str]):
+        """Number drives by their position in the scan list, which picks their colors"""
+        self._drive_index = {drive: i for i, drive in enumerate(drives)}
+    
+    def _color_for(self, drive: str) -> str:
+        """Return the display color for a drive
+        
+        Colors follow the drive's position in the scan list, so they are the
+        same on every run; drives outside it are numbered as they appear.
+        """
+        index = self._drive_index.get(drive)
+        if index is None:
+            index = self._drive_index[drive] = len(self._drive_index)
+        return _DRIVE_COLORS[index % len(_DRIVE_COLORS)]
+    
+    def _print(self, line: str):
+        """Write one line of scan output"""
+        print(line, flush=True)
+    
+    def _template_label(self, drive: str) -> str:
+        """Return the "[drive] " line label, with braces escaped for str.format"""
+        return f"[{drive:<8}] ".replace("{", "{{").replace("}", "}}")
+    
+    def _emit_progress(self, line_template: str, msg: str):
+        """Print a progress message through a drive's colored line template"""
+        self._print(line_template.format(msg))
+    
+    def _report_insert_error(self, drive: str, failed: list, zip_path: str, video_files: list, error: Exception):
+        """Report a zip that could not be stored and remember it in failed"""
+        self.status.report_error(drive, f"Could not store {os.path.basename(zip_path)}: {error}")
+        failed.append(len(video_files))
     
     def get_drive_info(self, drive: str) -> Tuple[str, float]:
         """Get drive label and size information"""
@@ -58,7 +149,16 @@ class BaseDriveProcessor(ABC):
         """Extract drive letter or mount point from a path"""
         return self.drive_scanner.get_drive_letter(path)
     
-    def find_zip_files_for_drive(self, drive: str) -> List[str]:
+    def _shared_drive_letter(self, drive: str) -> Optional[str]:
+        """Drive letter of every zip on drive, or None when it varies per zip
+        
+        Zips under the filesystem root are labelled by their top-level
+        directory, so only those need a lookup each.
+        """
+        drive_letter = self.get_drive_letter(drive)
+        return None if drive_letter == '/' else drive_letter
+    
+    def find_zip_files_for_drive(self, drive: str) -> List[ZipEntry]:
         """Find ZIP files for a drive based on scanning mode"""
         if self.root_folders_only:
             # GoogleTakeout mode
@@ -68,79 +168,236 @@ class BaseDriveProcessor(ABC):
             
             zip_files = []
             for takeout_path, _ in takeout_folders:
-                folder_zips = [
-                    os.path.join(takeout_path, f) 
-                    for f in os.listdir(takeout_path)
-                    if f.lower().endswith('.zip') and os.path.isfile(os.path.join(takeout_path, f))
-                ]
-                zip_files.extend(folder_zips)
+                # scandir entries carry the file type from the directory read,
+                # so only names ending in .zip ever need an is_file() check;
+                # their stat() is cached too (free on Windows), so neither the
+                # size shown while processing nor the insert needs another
+                with os.scandir(takeout_path) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith('.zip') and entry.is_file():
+                            stat_info = entry.stat()
+                            zip_files.append(ZipEntry(entry.path, entry.name, stat_info.st_size,
+                                                      zip_metadata(stat_info)))
             return zip_files
         else:
             # All ZIP files mode
-            return list(self.drive_scanner.find_all_zip_files_on_drive(drive))
+            return [ZipEntry(path) for path in self.drive_scanner.find_all_zip_files_on_drive(drive)]
+    
+    def _skip_unchanged(self, zip_files: List[ZipEntry]) -> List[ZipEntry]:
+        """Drop zips already stored with the same size and modification time
+        
+        Only unchanged zips are skipped; a changed one is scanned again and
+        its stored rows are replaced when it is inserted. Only zips the
+        database knows are stat'ed, and a changed one keeps the result for
+        its insert.
+        """
+        if not self._scanned_zips:
+            return zip_files
+        
+        changed = []
+        for entry in zip_files:
+            stored = self._scanned_zips.get(entry.path)
+            if stored is not None:
+                metadata = entry.metadata
+                try:
+                    if metadata is None:
+                        metadata = zip_metadata(os.stat(entry.path))
+                        entry = entry._replace(metadata=metadata)
+                    if metadata == stored:
+                        continue
+                except OSError:
+                    pass
+            changed.append(entry)
+        return changed
+    
+    def _start_scan_pool(self):
+        """Start the scan_processes worker pool, if configured
+        
+        Parsing a central directory is pure Python, so the GIL serializes it
+        whichever thread runs it; worker processes parse zips in parallel.
+        They are spawned rather than forked because threads may be running.
+        """
+        if self.scan_processes and self.scan_processes > 0 and self._scan_pool is None:
+            self._scan_pool = ProcessPoolExecutor(
+                max_workers=self.scan_processes, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_scan_worker, initargs=(self.config,))
+    
+    def _stop_scan_pool(self):
+        """Shut down the worker pool started by _start_scan_pool"""
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown()
+            self._scan_pool = None
+    
+    def _iter_scans(self, zip_files: List[ZipEntry]) -> Iterator[Tuple[ZipEntry, Optional[list]]]:
+        """Yield (zip_entry, video_files) in listing order
+        
+        With a worker pool every zip of the drive is handed to it up front
+        and results arrive in order while later zips are still parsed;
+        video_files is None when the zip is to be scanned in this thread.
+        """
+        if self._scan_pool is None:
+            for zip_entry in self._iter_prefetched(zip_files):
+                yield zip_entry, None
+            return
+        
+        scans = self._scan_pool.map(_scan_zip_worker, [entry.path for entry in zip_files],
+                                    itertools.repeat(self.all_files_mode), chunksize=8)
+        yield from zip(zip_files, scans)
+    
+    def _iter_prefetched(self, zip_files: List[ZipEntry]) -> Iterator[ZipEntry]:
+        """Yield zip entries while the next zip's metadata is read in the background
+        
+        zipfile only needs the central directory at the end of each archive.
+        Reading it one zip ahead overlaps the disk seek for zip N+1 with
+        scanning and inserting zip N, and zipfile then reads from the OS cache.
+        """
+        if len(zip_files) < 2:
+            yield from zip_files
+            return
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="zipprefetch") as prefetcher:
+            for i, zip_entry in enumerate(zip_files):
+                if i + 1 < len(zip_files):
+                    prefetcher.submit(self._prefetch_central_directory, zip_files[i + 1].path)
+                yield zip_entry
+    
+    def _prefetch_central_directory(self, zip_path: str):
+        """Read a zip's tail and the central directory it points to, discarding the data"""
+        try:
+            with open(zip_path, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                tail_start = max(0, size - ZIP_TAIL_PREFETCH)
+                f.seek(tail_start)
+                tail = f.read()
+                
+                eocd = tail.rfind(b'PK\x05\x06')
+                if eocd < 0 or eocd + 22 > len(tail):
+                    return
+                cd_size, cd_offset = struct.unpack_from('<II', tail, eocd + 12)
+                if cd_offset < tail_start and cd_size <= ZIP_PREFETCH_LIMIT:
+                    f.seek(cd_offset)
+                    f.read(min(cd_size, tail_start - cd_offset))
+        except OSError:
+            pass
     
     def process_zip_file(self, zip_path: str, db: DatabaseManager, 
-                        progress_callback: Optional[Callable[[str], None]] = None) -> Tuple[int, int]:
-        """Process a single ZIP file and return (zip_count, video_count)"""
-        zip_name = os.path.basename(zip_path)
+                        progress_callback: Optional[Callable[[str], None]] = None,
+                        zip_size: Optional[int] = None,
+                        zip_name: Optional[str] = None,
+                        video_files: Optional[list] = None,
+                        drive_letter: Optional[str] = None,
+                        listing_stat: Optional[Tuple[int, str]] = None) -> Tuple[int, int]:
+        """Process a single ZIP file and return (zip_count, video_count)
+        
+        zip_size and zip_name come from the directory listing when available;
+        otherwise they are derived from zip_path here. video_files is passed
+        when a worker process has already scanned the zip, drive_letter when
+        the caller has worked it out once for the whole drive, and
+        listing_stat, as zip_metadata() returns it, when the zip has already
+        been stat'ed.
+        """
+        if zip_name is None:
+            zip_name = os.path.basename(zip_path)
         if len(zip_name) > 35:
-            zip_name = zip_name[:32] + "..."
+            zip_name = f"{zip_name[:32]}..."
         
         # Get file size
-        try:
-            zip_size_mb = os.path.getsize(zip_path) / (1024 * 1024)
-            size_str = f"({zip_size_mb:.1f} MB)"
-        except:
+        if zip_size is None:
+            try:
+                zip_size = os.path.getsize(zip_path)
+            except OSError:
+                pass
+        if zip_size is not None:
+            size_str = f"({zip_size / (1024 * 1024):.1f} MB)"
+        else:
             size_str = "(size unknown)"
         
         if progress_callback:
             progress_callback(f"Processing: {zip_name} {size_str}")
         
         # Scan ZIP file
-        video_files = self.zip_scanner.scan_zip_for_videos(
-            zip_path, self.all_files_mode, progress_callback
-        )
+        if video_files is None:
+            video_files = self.zip_scanner.scan_zip_for_videos(
+                zip_path, self.all_files_mode, progress_callback
+            )
         
         if video_files:
             if progress_callback:
                 progress_callback(f"Inserting {len(video_files)} files from {zip_name}")
             
-            drive_letter = self.get_drive_letter(zip_path)
-            db.insert_zip_data(zip_path, video_files, progress_callback, drive_letter)
+            if drive_letter is None:
+                drive_letter = self.get_drive_letter(zip_path)
+            db.insert_zip_data(zip_path, video_files, progress_callback, drive_letter,
+                               metadata=listing_stat)
             return 1, len(video_files)
         
         return 0, 0
     
-    def show_drive_scan_start(self, drive: str, zip_count: int, thread_prefix: str = "") -> str:
-        """Show drive scan start message and return color for this drive"""
-        drive_colors = [Fore.GREEN, Fore.BLUE, Fore.MAGENTA, Fore.CYAN, Fore.YELLOW]
-        drive_index = hash(drive) % len(drive_colors)
-        drive_color = drive_colors[drive_index]
+    def _store_drive_zips(self, drive: str, db: DatabaseManager, zip_files: List[ZipEntry],
+                          drive_color: str, thread_prefix: str = "",
+                          zip_done: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+        """Scan and store a drive's zips and return (zip_count, video_count)
+        
+        zip_done(i), when given, is called after the i-th zip is processed.
+        """
+        # Colors and the drive label are fixed per drive, so the line
+        # templates are built once and only the message is formatted in
+        line_template = f"{drive_color}{thread_prefix}{self._template_label(drive)}{{}}{Style.RESET_ALL}"
+        progress_callback = functools.partial(self._emit_progress, line_template)
+        drive_letter = self._shared_drive_letter(drive)
+        total_zips = 0
+        total_videos = 0
+        
+        # Buffer inserts so small zips share a batch, and commit the
+        # whole drive at once; a zip that cannot be stored is rolled back
+        # on its own and reported, and the rest of the drive is kept
+        failed = []
+        on_error = functools.partial(self._report_insert_error, drive, failed)
+        with db.transaction(), db.batch(self.batch_size, on_error):
+            for i, ((zip_path, zip_name, zip_size, metadata), video_files) in enumerate(self._iter_scans(zip_files)):
+                zip_count, video_count = self.process_zip_file(zip_path, db, progress_callback,
+                                                               zip_size, zip_name, video_files,
+                                                               drive_letter, metadata)
+                total_zips += zip_count
+                total_videos += video_count
+                if zip_done is not None:
+                    zip_done(i)
+        return total_zips - len(failed), total_videos - sum(failed)
+    
+    def show_drive_scan_start(self, drive: str, zip_count: int, thread_prefix: str = "",
+                              unchanged_count: int = 0) -> str:
+        """Show drive scan start message and return color for this drive
+        
+        zip_count is the number of zips to process, unchanged_count the
+        number found but skipped because they are stored unchanged.
+        """
+        drive_color = self._color_for(drive)
         
         label, size_gb = self.get_drive_info(drive)
         mode_str = "GoogleTakeout mode" if self.root_folders_only else "all zip files"
         
-        print(f"\n{drive_color}{thread_prefix}Scanning drive ({mode_str}): {drive} [{label}, {size_gb:.1f} GB]{Style.RESET_ALL}")
-        if zip_count > 0:
-            print(f"{drive_color}{thread_prefix}Found {zip_count} zip files to process{Style.RESET_ALL}")
+        self._print(f"\n{drive_color}{thread_prefix}Scanning drive ({mode_str}): {drive} [{label}, {size_gb:.1f} GB]{Style.RESET_ALL}")
+        if unchanged_count > 0:
+            self._print(f"{drive_color}{thread_prefix}Found {zip_count + unchanged_count} zip files: "
+                        f"{unchanged_count} unchanged, {zip_count} to process{Style.RESET_ALL}")
+        elif zip_count > 0:
+            self._print(f"{drive_color}{thread_prefix}Found {zip_count} zip files to process{Style.RESET_ALL}")
         else:
-            print(f"{drive_color}{thread_prefix}No ZIP files found{Style.RESET_ALL}")
+            self._print(f"{drive_color}{thread_prefix}No ZIP files found{Style.RESET_ALL}")
         
         return drive_color
     
     def show_drive_scan_complete(self, result: DriveProcessingResult, thread_prefix: str = ""):
         """Show drive scan completion message"""
-        drive_colors = [Fore.GREEN, Fore.BLUE, Fore.MAGENTA, Fore.CYAN, Fore.YELLOW]
-        drive_index = hash(result.drive) % len(drive_colors)
-        drive_color = drive_colors[drive_index]
+        drive_color = self._color_for(result.drive)
         
         if result.success:
             if result.video_count > 0:
-                print(f"{drive_color}{thread_prefix}{result.drive} COMPLETE: {result.zip_count} zip files, {result.video_count:,} videos ({result.processing_time:.1f}s){Style.RESET_ALL}")
+                self._print(f"{drive_color}{thread_prefix}{result.drive} COMPLETE: {result.zip_count} zip files, {result.video_count:,} videos ({result.processing_time:.1f}s){Style.RESET_ALL}")
             else:
-                print(f"{drive_color}{thread_prefix}{result.drive} COMPLETE: No video files found in {result.zip_count} zip files ({result.processing_time:.1f}s){Style.RESET_ALL}")
+                self._print(f"{drive_color}{thread_prefix}{result.drive} COMPLETE: No video files found in {result.zip_count} zip files ({result.processing_time:.1f}s){Style.RESET_ALL}")
         else:
-            print(f"{drive_color}{thread_prefix}{result.drive} FAILED: {result.error}{Style.RESET_ALL}")
+            self._print(f"{drive_color}{thread_prefix}{result.drive} FAILED: {result.error}{Style.RESET_ALL}")
     
     @abstractmethod
     def process_drive(self, drive: str, db: DatabaseManager) -> DriveProcessingResult:
@@ -162,32 +419,23 @@ class SequentialDriveProcessor(BaseDriveProcessor):
         
         try:
             # Find ZIP files
-            zip_files = self.find_zip_files_for_drive(drive)
-            drive_color = self.show_drive_scan_start(drive, len(zip_files))
+            found = self.find_zip_files_for_drive(drive)
+            zip_files = self._skip_unchanged(found)
+            drive_color = self.show_drive_scan_start(drive, len(zip_files), "", len(found) - len(zip_files))
             
             if not zip_files:
                 processing_time = time.time() - start_time
                 return DriveProcessingResult(drive, 0, 0, processing_time)
             
             # Process ZIP files
-            total_zips = 0
-            total_videos = 0
+            total_zips, total_videos = self._store_drive_zips(drive, db, zip_files, drive_color)
             
-            for i, zip_path in enumerate(zip_files):
-                def progress_callback(msg):
-                    print(f"{drive_color}[{drive:<8}] {msg}{Style.RESET_ALL}", flush=True)
-                
-                zip_count, video_count = self.process_zip_file(zip_path, db, progress_callback)
-                total_zips += zip_count
-                total_videos += video_count
-                
-                # Show progress
-                progress = (i + 1) / len(zip_files)
-                self.progress.print_progress_bar_enhanced(
-                    progress, 35, drive, i + 1, len(zip_files), drive_color,
-                    "COMPLETE" if i == len(zip_files) - 1 else os.path.basename(zip_path),
-                    f"ETA: 00:00" if i == len(zip_files) - 1 else "Processing..."
-                )
+            # The enhanced bar only draws the finished line, so there is
+            # nothing to show until every zip is done
+            self.progress.print_progress_bar_enhanced(
+                1.0, 35, drive, len(zip_files), len(zip_files), drive_color,
+                "COMPLETE", "ETA: 00:00"
+            )
             
             processing_time = time.time() - start_time
             result = DriveProcessingResult(drive, total_zips, total_videos, processing_time)
@@ -196,18 +444,30 @@ class SequentialDriveProcessor(BaseDriveProcessor):
             
         except Exception as e:
             processing_time = time.time() - start_time
-            return DriveProcessingResult(drive, 0, 0, processing_time, str(e))
+            result = DriveProcessingResult(drive, 0, 0, processing_time, str(e))
+            self.show_drive_scan_complete(result)
+            return result
     
     def process_all_drives(self, drives: List[str], main_db: DatabaseManager) -> Tuple[int, int]:
-        """Process all drives sequentially"""
+        """Process all drives sequentially
+        
+        With scan_processes set, each drive's zips are parsed by worker
+        processes while this thread inserts the results.
+        """
+        self._index_drives(drives)
+        self._scanned_zips = main_db.get_scanned_zips()
         total_zips = 0
         total_videos = 0
         
-        for drive in drives:
-            result = self.process_drive(drive, main_db)
-            if result.success:
-                total_zips += result.zip_count
-                total_videos += result.video_count
+        self._start_scan_pool()
+        try:
+            for drive in drives:
+                result = self.process_drive(drive, main_db)
+                if result.success:
+                    total_zips += result.zip_count
+                    total_videos += result.video_count
+        finally:
+            self._stop_scan_pool()
         
         return total_zips, total_videos
 
@@ -218,6 +478,85 @@ class ThreadedDriveProcessor(BaseDriveProcessor):
     def __init__(self, config: dict, console_lock=None):
         super().__init__(config)
         self.console_lock = console_lock
+        # nullcontext() is reusable, so one instance stands in for a missing lock
+        self._print_lock = console_lock if console_lock is not None else contextlib.nullcontext()
+        self._print_queue = None
+        self._printer = None
+        # Upper bound on drive scanning threads; the devices found bound it further
+        self.max_workers = config.get('max_workers') or max(4, (os.cpu_count() or 4) * 2)
+        # Drive scanning threads, created on first use and kept for later scans
+        self._executor = None
+    
+    def _drive_executor(self) -> ThreadPoolExecutor:
+        """Return the drive scanning executor, creating it on first use
+        
+        The executor only starts a thread when a job finds none idle, so a
+        scan of fewer devices than max_workers starts just one per device.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="driveproc")
+        return self._executor
+    
+    def close(self):
+        """Shut down the drive scanning threads"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def _print(self, line: str):
+        """Queue a line for the printer thread, or print it directly when none is running"""
+        print_queue = self._print_queue
+        if print_queue is not None:
+            print_queue.put_nowait(line + '\n')
+            return
+        with self._print_lock:
+            print(line, flush=True)
+    
+    def _start_printer(self):
+        """Start the thread that writes all worker output
+        
+        Progress bars and status lines are routed through it too, so workers
+        never write to stdout themselves.
+        """
+        self._print_queue = queue.SimpleQueue()
+        self._printer = threading.Thread(target=self._drain_prints, args=(self._print_queue,),
+                                         name="driveproc-printer", daemon=True)
+        self._printer.start()
+        console.redirect(self._print_queue.put_nowait)
+    
+    def _stop_printer(self):
+        """Flush queued output and stop the printer thread"""
+        if self._print_queue is None:
+            return
+        console.redirect(None)
+        self._print_queue.put(None)
+        self._printer.join()
+        self._print_queue = None
+        self._printer = None
+    
+    def _drain_prints(self, print_queue: queue.SimpleQueue):
+        """Write queued text in batches: one write and flush per wakeup
+        
+        Workers never touch stdout or the console lock; whatever queued up
+        while the previous batch was being written goes out together.
+        """
+        while True:
+            lines = [print_queue.get()]
+            while True:
+                try:
+                    lines.append(print_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in lines
+            if stop:
+                lines = lines[:lines.index(None)]
+            if lines:
+                with self._print_lock:
+                    sys.stdout.write(''.join(lines))
+                    sys.stdout.flush()
+            if stop:
+                return
     
     def process_drive(self, drive: str, db: DatabaseManager) -> DriveProcessingResult:
         """Process a single drive in a thread-safe manner"""
@@ -226,50 +565,56 @@ class ThreadedDriveProcessor(BaseDriveProcessor):
         
         try:
             # Find ZIP files
-            zip_files = self.find_zip_files_for_drive(drive)
+            found = self.find_zip_files_for_drive(drive)
+            zip_files = self._skip_unchanged(found)
             
-            with self.console_lock if self.console_lock else contextlib.nullcontext():
-                drive_color = self.show_drive_scan_start(drive, len(zip_files), thread_prefix)
+            drive_color = self.show_drive_scan_start(drive, len(zip_files), thread_prefix,
+                                                     len(found) - len(zip_files))
             
             if not zip_files:
                 processing_time = time.time() - start_time
                 return DriveProcessingResult(drive, 0, 0, processing_time)
             
-            # Process ZIP files
-            total_zips = 0
-            total_videos = 0
+            progress_template = (f"{drive_color}{thread_prefix}{self._template_label(drive)}"
+                                 f"Progress: {{:.1f}}% ({{}}/{len(zip_files)}){Style.RESET_ALL}")
+            last_progress = 0.0
             
-            for i, zip_path in enumerate(zip_files):
-                def progress_callback(msg):
-                    with self.console_lock if self.console_lock else contextlib.nullcontext():
-                        print(f"{drive_color}{thread_prefix}[{drive:<8}] {msg}{Style.RESET_ALL}", flush=True)
-                
-                zip_count, video_count = self.process_zip_file(zip_path, db, progress_callback)
-                total_zips += zip_count
-                total_videos += video_count
-                
-                # Show progress
+            def show_progress(i):
+                # Show progress, at most every PROGRESS_INTERVAL seconds
+                nonlocal last_progress
+                now = time.monotonic()
+                if now - last_progress < PROGRESS_INTERVAL and i != len(zip_files) - 1:
+                    return
+                last_progress = now
                 progress_pct = ((i + 1) / len(zip_files)) * 100
-                with self.console_lock if self.console_lock else contextlib.nullcontext():
-                    print(f"{drive_color}{thread_prefix}[{drive:<8}] Progress: {progress_pct:.1f}% ({i + 1}/{len(zip_files)}){Style.RESET_ALL}")
+                self._print(progress_template.format(progress_pct, i + 1))
+            
+            # Process ZIP files
+            total_zips, total_videos = self._store_drive_zips(drive, db, zip_files, drive_color,
+                                                              thread_prefix, show_progress)
             
             processing_time = time.time() - start_time
             result = DriveProcessingResult(drive, total_zips, total_videos, processing_time)
             
-            with self.console_lock if self.console_lock else contextlib.nullcontext():
-                self.show_drive_scan_complete(result, thread_prefix)
+            self.show_drive_scan_complete(result, thread_prefix)
             
             return result
             
         except Exception as e:
             processing_time = time.time() - start_time
-            return DriveProcessingResult(drive, 0, 0, processing_time, str(e))
+            result = DriveProcessingResult(drive, 0, 0, processing_time, str(e))
+            self.show_drive_scan_complete(result, thread_prefix)
+            return result
     
     def process_all_drives(self, drives: List[str], main_db: DatabaseManager) -> Tuple[int, int]:
-        """Process all drives using threading with separate databases"""
-        import threading
-        import tempfile
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        """Process all drives using threading with separate databases
+        
+        Threads rather than asyncio: directory walks, zipfile and sqlite3
+        are all blocking calls, so an event loop would only hand the same
+        work to a thread pool via run_in_executor.
+        """
+        self._index_drives(drives)
+        self._scanned_zips = main_db.get_scanned_zips()
         
         # Create temporary database files for each thread
         temp_db_files = []
@@ -277,62 +622,143 @@ class ThreadedDriveProcessor(BaseDriveProcessor):
             temp_db_path = f"{main_db.database_path}.thread_{i}_{drive.replace('/', '_').replace(':', '_')}.tmp"
             temp_db_files.append(temp_db_path)
         
-        # Process drives in parallel
+        # Drives on the same spinning disk share one job so they are scanned
+        # back to back instead of making the disk seek between them
+        device_jobs = {}
+        for drive, temp_db_path in zip(drives, temp_db_files):
+            device = self.drive_scanner.get_physical_device(drive)
+            device_jobs.setdefault(device, []).append((drive, temp_db_path))
+        
+        # Process devices in parallel, merging each finished drive's database
+        # while the slower drives are still being scanned
         drive_results = {}
-        thread_db_files = []
-        
-        with ThreadPoolExecutor(max_workers=len(drives)) as executor:
-            # Submit all drive scan jobs with their own database files
-            future_to_drive = {}
-            for i, drive in enumerate(drives):
-                temp_db_path = temp_db_files[i]
-                future = executor.submit(self._process_drive_with_db, drive, temp_db_path)
-                future_to_drive[future] = (drive, temp_db_path)
+        merge_queue = queue.Queue(maxsize=MERGE_QUEUE_SIZE)
+        merge_errors = []
+        
+        # Started before any of our threads, though spawning makes this safe either way
+        self._start_scan_pool()
+        self._start_printer()
+        merger = threading.Thread(target=self._run_merger, args=(merge_queue, main_db, merge_errors),
+                                  name="driveproc-merger", daemon=True)
+        merger.start()
+        future_to_job = {}
+        try:
+            # One thread per physical device, so each device's I/O queue stays
+            # busy; directory walks and reads release the GIL while they wait
+            executor = self._drive_executor()
+            # Submit one job per device; each drive gets its own database file
+            for job in device_jobs.values():
+                future = executor.submit(self._process_device_drives, job)
+                future_to_job[future] = job
             
             # Collect results as they complete
-            for future in as_completed(future_to_drive):
-                drive, temp_db_path = future_to_drive[future]
-                try:
-                    result = future.result()
+            for future in as_completed(future_to_job):
+                for (drive, temp_db_path), result in zip(future_to_job[future], future.result()):
                     drive_results[drive] = result
-                    if os.path.exists(temp_db_path):
-                        thread_db_files.append(temp_db_path)
-                except Exception as exc:
-                    print(f"{Fore.RED}Drive {drive} generated an exception: {exc}{Style.RESET_ALL}")
-                    drive_results[drive] = DriveProcessingResult(drive, 0, 0, 0, str(exc))
-        
-        # Merge all thread databases into the main database
-        if thread_db_files:
-            print(f"\n{Style.BRIGHT}{Fore.WHITE}Merging thread databases...{Style.RESET_ALL}")
+                    if os.path.exists(temp_db_path) and not self._queue_merge(merge_queue, merger, temp_db_path):
+                        raise merge_errors[0] if merge_errors else RuntimeError("Database merger stopped")
+        finally:
+            # The executor outlives this call, so after an error the jobs
+            # still running are waited for before their printer stops
+            for future in future_to_job:
+                future.cancel()
+            wait(future_to_job)
+            self._queue_merge(merge_queue, merger, None)
+            merger.join()
+            self._stop_printer()
+            self._stop_scan_pool()
+        
+        if merge_errors:
+            raise merge_errors[0]
+        
+        # Calculate totals
+        total_zips = sum(result.zip_count for result in drive_results.values() if result.success)
+        total_videos = sum(result.video_count for result in drive_results.values() if result.success)
+        
+        return total_zips, total_videos
+    
+    def _queue_merge(self, merge_queue: queue.Queue, merger: threading.Thread, item) -> bool:
+        """Hand item to the merger thread; False if the merger stopped before taking it"""
+        while True:
+            try:
+                merge_queue.put(item, timeout=MERGE_QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                if not merger.is_alive():
+                    return False
+    
+    def _run_merger(self, merge_queue: queue.Queue, main_db: DatabaseManager,
+                    errors: List[Exception]):
+        """Run _merge_loop, recording an unexpected error for process_all_drives to raise"""
+        try:
+            self._merge_loop(merge_queue, main_db, errors)
+        except Exception as e:
+            errors.append(e)
+    
+    def _merge_loop(self, merge_queue: queue.Queue, main_db: DatabaseManager,
+                    errors: List[Exception]):
+        """Merge thread databases into main_db as they arrive, until None
+        
+        Whatever queued up during the previous merge is merged as one group.
+        On failure the error is recorded and the remaining files are left
+        on disk.
+        """
+        def merge_progress_callback(msg):
+            self._print(f"{Fore.CYAN}[MERGE] {msg}{Style.RESET_ALL}")
+        
+        merged_any = False
+        stop = False
+        while not stop:
+            paths = [merge_queue.get()]
+            while True:
+                try:
+                    paths.append(merge_queue.get_nowait())
+                except queue.Empty:
+                    break
             
-            def merge_progress_callback(msg):
-                print(f"{Fore.CYAN}[MERGE] {msg}{Style.RESET_ALL}")
+            stop = None in paths
+            if stop:
+                paths = paths[:paths.index(None)]
+            if not paths or errors:
+                continue
             
-            main_db.merge_databases(thread_db_files, merge_progress_callback)
+            if not merged_any:
+                self._print(f"\n{Style.BRIGHT}{Fore.WHITE}Merging thread databases...{Style.RESET_ALL}")
+                merged_any = True
+            try:
+                main_db.merge_databases(paths, merge_progress_callback, optimize=False)
+            except Exception as e:
+                errors.append(e)
+                continue
             
             # Clean up temporary database files
-            for temp_db_path in thread_db_files:
+            for temp_db_path in paths:
                 try:
                     os.unlink(temp_db_path)
-                    print(f"{Fore.GREEN}[CLEANUP] Removed {os.path.basename(temp_db_path)}{Style.RESET_ALL}")
+                    self._print(f"{Fore.GREEN}[CLEANUP] Removed {os.path.basename(temp_db_path)}{Style.RESET_ALL}")
                 except Exception as e:
-                    print(f"{Fore.YELLOW}Warning: Could not remove {temp_db_path}: {e}{Style.RESET_ALL}")
+                    self._print(f"{Fore.YELLOW}Warning: Could not remove {temp_db_path}: {e}{Style.RESET_ALL}")
         
-        # Calculate totals
-        total_zips = sum(result.zip_count for result in drive_results.values() if result.success)
-        total_videos = sum(result.video_count for result in drive_results.values() if result.success)
-        
-        return total_zips, total_videos
+        if merged_any and not errors:
+            main_db.optimize()
+    
+    def _process_device_drives(self, job: List[Tuple[str, str]]) -> List[DriveProcessingResult]:
+        """Process the (drive, thread_db_path) pairs of one device in order"""
+        results = []
+        for drive, thread_db_path in job:
+            try:
+                results.append(self._process_drive_with_db(drive, thread_db_path))
+            except Exception as exc:
+                self._print(f"{Fore.RED}Drive {drive} generated an exception: {exc}{Style.RESET_ALL}")
+                results.append(DriveProcessingResult(drive, 0, 0, 0, str(exc)))
+        return results
     
     def _process_drive_with_db(self, drive: str, thread_db_path: str) -> DriveProcessingResult:
         """Process a drive with its own database file"""
-        thread_db = DatabaseManager(thread_db_path)
+        # Temporary and rebuilt by rescanning, so it can skip durability
+        thread_db = DatabaseManager(thread_db_path, scratch=True)
         try:
             result = self.process_drive(drive, thread_db)
             return result
         finally:
             thread_db.close()
-
-
-# Import contextlib for nullcontext
-import contextlib
\ No newline at end of file
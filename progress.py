@@ -4,34 +4,189 @@ Progress display utilities for PySearchZips
 Handles progress bars, spinners, and heartbeat indicators
 """
 
+import sys
 import time
+import atexit
+import functools
+import itertools
 import threading
 from colorama import Fore, Style
 
+# Seconds between spinner frames; each frame wakes the spinner thread
+SPINNER_INTERVAL = 0.25
+
+# Longest a line redraw without a newline may wait in the console buffer
+# before it is written; complete lines are written at once
+CONSOLE_FLUSH_INTERVAL = 0.05
+
+# When stdout is not a terminal, progress bars become plain log lines:
+# one per drive each time it gets this many percent further, and one at the end
+PLAIN_PROGRESS_STEP = 5
+
+class BufferedConsole:
+    """Coalesces progress output into fewer, larger stdout writes
+    
+    Shared by every ProgressDisplay and StatusReporter so that their output
+    keeps its order. Writes go to whatever sys.stdout is at flush time, so
+    redirection and colorama's wrapping still apply, unless redirect() has
+    handed them to a printer thread.
+    """
+    
+    def __init__(self, interval: float = CONSOLE_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._sink = None
+        self._lock = threading.Lock()
+        # One flusher thread, started on first need, writes out text held
+        # back by emit() if nothing else does in time
+        self._held = threading.Condition(self._lock)
+        self._flusher = None
+    
+    def emit(self, text: str):
+        """Queue text, writing it out with anything pending when it ends a
+        line or the flush interval has passed
+        
+        Text held back is written by the flusher thread at the end of the
+        interval, so a last redraw never waits for the next emit.
+        """
+        with self._lock:
+            self._pending.append(text)
+            if '\n' in text or time.monotonic() - self._last_flush >= self.interval:
+                self._flush_locked()
+            elif len(self._pending) == 1:
+                # Only the first held-back text needs to wake the flusher
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_held, name="console-flusher",
+                                                     daemon=True)
+                    self._flusher.start()
+                self._held.notify()
+    
+    def flush(self):
+        """Write out anything still pending"""
+        with self._lock:
+            self._flush_locked()
+    
+    def redirect(self, sink=None):
+        """Pass flushed text to sink instead of writing it; None restores stdout
+        
+        Anything pending goes to the old destination first, so order is kept.
+        """
+        with self._lock:
+            self._flush_locked()
+            self._sink = sink
+    
+    def _flush_held(self):
+        """Flusher thread: write out held-back text once the interval has passed"""
+        with self._lock:
+            while True:
+                if not self._pending:
+                    self._held.wait()
+                    continue
+                delay = self._last_flush + self.interval - time.monotonic()
+                if delay > 0:
+                    self._held.wait(delay)
+                    continue
+                self._flush_locked()
+    
+    def _flush_locked(self):
+        """Write out the pending text; the caller holds the lock"""
+        if self._pending:
+            text = ''.join(self._pending)
+            self._pending.clear()
+            if self._sink is not None:
+                self._sink(text)
+            else:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+        self._last_flush = time.monotonic()
+
+console = BufferedConsole()
+# A last redraw can still be pending when the program ends
+atexit.register(console.flush)
+
+@functools.lru_cache(maxsize=4096)
+def _bar(width: int, filled_length: int) -> str:
+    """Bar of width glyphs with filled_length of them filled
+    
+    Cached for every ProgressDisplay: bars come in a couple of widths, so
+    redrawing one is nearly always a cache hit.
+    """
+    filled_length = min(max(filled_length, 0), width)
+    return '█' * filled_length + '░' * (width - filled_length)
+
 class ProgressDisplay:
     """Handles all progress display functionality"""
     
     def __init__(self):
         self.spinner_chars = "|/-\\|/-\\"
+        # Last bar drawn per drive, as tenths of a percent and the total, so
+        # redraws that would look the same are skipped
+        self._last_render = {}
+        # Redraws, colors and spinners only make sense on a terminal; piped
+        # or redirected output gets plain lines instead
+        self._is_tty = sys.stdout.isatty()
+        # Progress last logged per drive when not on a terminal
+        self._last_logged = {}
+    
+    def _unchanged(self, drive_name: str, progress: float, total: int, force: bool) -> bool:
+        """Record a drive's frame; True when it matches the one last drawn"""
+        frame = (int(progress * 1000), total)
+        if not force and self._last_render.get(drive_name) == frame:
+            return True
+        self._last_render[drive_name] = frame
+        return False
     
     def print_progress_bar(self, progress: float, width: int = 50, drive_name: str = "", 
-                          current: int = 0, total: int = 0, color: str = Fore.GREEN):
-        """Print a colored progress bar"""
+                          current: int = 0, total: int = 0, color: str = Fore.GREEN,
+                          force: bool = False):
+        """Print a colored progress bar
+        
+        Calls that would redraw the drive's bar at the same tenth of a percent
+        print nothing unless force is set. Off a terminal this logs a plain
+        line every PLAIN_PROGRESS_STEP instead.
+        """
+        if not self._is_tty:
+            self._log_progress(progress, drive_name, current, total, force)
+            return
+        if self._unchanged(drive_name, progress, total, force):
+            return
+        
         filled_length = int(width * progress)
-        bar = '█' * filled_length + '░' * (width - filled_length)
+        bar = _bar(width, filled_length)
         
         percentage = progress * 100
         status_text = f"{current}/{total}" if total > 0 else ""
         
         # Clear the line and print progress bar
-        print(f"\r{color}[{drive_name:<8}] |{bar}| {percentage:6.1f}% {status_text}", end="", flush=True)
+        console.emit(f"\r{color}[{drive_name.ljust(8)}] |{bar}| {percentage:6.1f}% {status_text}{Style.RESET_ALL}")
+    
+    def _log_progress(self, progress: float, drive_name: str, current: int, total: int,
+                      force: bool):
+        """Log an uncolored progress line when the drive has moved on enough"""
+        percent = round(progress * 100)
+        last = self._last_logged.get(drive_name)
+        # Progress going backwards means the drive is being scanned again
+        if (not force and progress < 1.0 and last is not None
+                and 0 <= percent - last < PLAIN_PROGRESS_STEP):
+            return
+        self._last_logged[drive_name] = percent
+        status_text = f" {current}/{total}" if total > 0 else ""
+        console.emit(f"[{drive_name}] {percent}%{status_text}\n")
     
     def print_progress_bar_enhanced(self, progress: float, width: int = 35, drive_name: str = "", 
                                   current: int = 0, total: int = 0, color: str = Fore.GREEN,
                                   current_file: str = "", eta: str = ""):
-        """Print an enhanced progress bar with current file and ETA"""
+        """Print an enhanced progress bar with current file and ETA
+        
+        Only the finished bar is printed, on its own line for thread safety;
+        earlier calls return before building anything.
+        """
+        if progress < 1.0 and current_file != "COMPLETE":
+            return
+        
         filled_length = int(width * progress)
-        bar = '█' * filled_length + '░' * (width - filled_length)
+        bar = _bar(width, filled_length)
         
         percentage = progress * 100
         status_text = f"{current}/{total}"
@@ -40,22 +195,38 @@ class ProgressDisplay:
         if len(current_file) > 25:
             current_file = current_file[:22] + "..."
         
-        # Print progress bar with newline for thread safety
-        if progress >= 1.0 or current_file == "COMPLETE":
-            print(f"{color}[{drive_name:<8}] |{bar}| {percentage:5.1f}% {status_text} | {current_file:<25} | {eta}{Style.RESET_ALL}", 
-                  flush=True)
+        line = f"[{drive_name.ljust(8)}] |{bar}| {percentage:5.1f}% {status_text} | {current_file.ljust(25)} | {eta}"
+        console.emit(f"{color}{line}{_LINE_END}" if self._is_tty else line + "\n")
     
     def spinner_animation(self, message: str, color: str = Fore.CYAN, stop_event=None):
-        """Display spinning animation with message"""
-        i = 0
-        while not (stop_event and stop_event.is_set()):
-            print(f"\r{color}{self.spinner_chars[i % len(self.spinner_chars)]} {message}{Style.RESET_ALL}", end="", flush=True)
-            i += 1
-            time.sleep(0.1)
+        """Display spinning animation with message; does nothing off a terminal"""
+        if not self._is_tty:
+            return
+        stop_event = stop_event or threading.Event()
+        # Every frame is built up front; each tick only emits the next one
+        frames = [f"\r{color}{char} {message}{Style.RESET_ALL}" for char in self.spinner_chars]
+        next_frame = time.monotonic()
+        for frame in itertools.cycle(frames):
+            if stop_event.is_set():
+                break
+            console.emit(frame)
+            # Frames are due on a fixed schedule so slow writes do not make
+            # the spinner drift, without catching up on frames already missed;
+            # wait returns as soon as we are stopped
+            now = time.monotonic()
+            next_frame = max(next_frame + SPINNER_INTERVAL, now)
+            stop_event.wait(next_frame - now)
+        console.emit('\r' + ' ' * (len(message) + 2) + '\r')
     
     def start_spinner(self, message: str, color: str = Fore.CYAN):
-        """Start spinner in background thread"""
+        """Start spinner in background thread
+        
+        Returns (stop_event, thread). When stdout is not a terminal the frames
+        would only pile up in a log, so no thread is started and thread is None.
+        """
         stop_event = threading.Event()
+        if not self._is_tty:
+            return stop_event, None
         spinner_thread = threading.Thread(target=self.spinner_animation, args=(message, color, stop_event))
         spinner_thread.daemon = True
         spinner_thread.start()
@@ -67,18 +238,31 @@ class HeartbeatManager:
     def __init__(self, interval: float = 2.0):
         self.interval = interval
         self.last_heartbeat = {}
+        # Taken only when a heartbeat is due, so that of several threads
+        # finding it due at once exactly one shows it
+        self._lock = threading.Lock()
     
-    def should_show_heartbeat(self, operation_id: str) -> bool:
-        """Check if heartbeat should be shown for this operation"""
-        current_time = time.time()
-        if operation_id not in self.last_heartbeat:
-            self.last_heartbeat[operation_id] = current_time
-            return False
+    def should_show_heartbeat(self, operation_id: str, now: float = None) -> bool:
+        """Check if heartbeat should be shown for this operation
         
-        if current_time - self.last_heartbeat[operation_id] >= self.interval:
-            self.last_heartbeat[operation_id] = current_time
-            return True
+        now is a time.monotonic() reading the caller already has, saving a
+        clock read per check. Safe to call from several threads: the usual
+        not-yet-due answer takes no lock.
+        """
+        if now is None:
+            now = time.monotonic()
+        last = self.last_heartbeat.get(operation_id)
+        if last is None:
+            self.last_heartbeat.setdefault(operation_id, now)
+            return False
+        if now - last < self.interval:
+            return False
         
+        # Claim this heartbeat only if no other thread has since
+        with self._lock:
+            if self.last_heartbeat.get(operation_id) == last:
+                self.last_heartbeat[operation_id] = now
+                return True
         return False
     
     def reset(self, operation_id: str = None):
@@ -88,6 +272,13 @@ class HeartbeatManager:
         else:
             self.last_heartbeat.clear()
 
+# The fixed parts of StatusReporter lines, joined once. Every line still
+# ends with a reset: output from elsewhere may follow it
+_COMPLETION_PREFIX = f"{Fore.GREEN}["
+_ERROR_PREFIX = f"{Fore.RED}["
+_WARNING_PREFIX = f"{Fore.YELLOW}["
+_LINE_END = f"{Style.RESET_ALL}\n"
+
 class StatusReporter:
     """Reports status updates with consistent formatting"""
     
@@ -96,16 +287,16 @@ class StatusReporter:
     
     def report_processing(self, drive: str, message: str):
         """Report a processing status message"""
-        print(f"{self.drive_color}[{drive:<8}] {message}{Style.RESET_ALL}", flush=True)
+        console.emit(f"{self.drive_color}[{drive:<8}] {message}{_LINE_END}")
     
     def report_completion(self, drive: str, message: str):
         """Report a completion message"""
-        print(f"{Fore.GREEN}[{drive:<8}] {message}{Style.RESET_ALL}", flush=True)
+        console.emit(f"{_COMPLETION_PREFIX}{drive:<8}] {message}{_LINE_END}")
     
     def report_error(self, drive: str, message: str):
         """Report an error message"""
-        print(f"{Fore.RED}[{drive:<8}] ERROR: {message}{Style.RESET_ALL}", flush=True)
+        console.emit(f"{_ERROR_PREFIX}{drive:<8}] ERROR: {message}{_LINE_END}")
     
     def report_warning(self, drive: str, message: str):
         """Report a warning message"""
-        print(f"{Fore.YELLOW}[{drive:<8}] WARNING: {message}{Style.RESET_ALL}", flush=True)
\ No newline at end of file
+        console.emit(f"{_WARNING_PREFIX}{drive:<8}] WARNING: {message}{_LINE_END}")
\ No newline at end of file
@@ -4,10 +4,14 @@ Drive and ZIP file scanning logic for PySearchZips
 Handles file system operations and ZIP content scanning
 """
 
+import io
 import os
+import mmap
+import functools
 import platform
 import zipfile
 import time
+import struct
 import shutil
 import subprocess
 from pathlib import Path
@@ -17,6 +21,145 @@ from progress import ProgressDisplay, StatusReporter, HeartbeatManager
 
 logger = logging.getLogger(__name__)
 
+# Leading signatures of a ZIP: local file header, empty archive, spanned archive
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06', b'PK\x07\x08')
+
+# Records read by read_central_directory, laid out as in the ZIP spec
+_EOCD = struct.Struct('<4s4H2LH')              # end of central directory
+_EOCD64_LOCATOR = struct.Struct('<4sLQL')      # ZIP64 end record locator
+_EOCD64 = struct.Struct('<4sQ2H2L4Q')          # ZIP64 end of central directory
+# Central directory file header, keeping extract version, flags, sizes and
+# the three variable-length field lengths
+_CD_RECORD = struct.Struct('<4s2xBxH10xLLHHH12x')
+_MAX_COMMENT = (1 << 16) - 1
+_MAX_EXTRACT_VERSION = 63
+_UTF8_NAME_FLAG = 0x800
+
+
+def read_central_directory(f) -> Tuple[int, bytes]:
+    """Return (entry_count, central directory bytes) of an open zip file
+    
+    Locates the directory the way zipfile does, including ZIP64 end records
+    and archives with data prepended to them. Raises ValueError when no
+    directory can be found.
+    
+    The file is memory-mapped when it can be, so the end records are read
+    straight from the page cache instead of by a seek and read each; the
+    mapping is closed again as soon as the directory has been copied out.
+    """
+    try:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # Empty files cannot be mapped, and not every file object has a descriptor
+        return _locate_central_directory(functools.partial(_read_file_at, f), f.seek(0, os.SEEK_END))
+    with view:
+        return _locate_central_directory(lambda offset, size: view[offset:offset + size], len(view))
+
+
+def _read_file_at(f, offset: int, size: int) -> bytes:
+    """Read up to size bytes at offset of an open file"""
+    f.seek(offset)
+    return f.read(size)
+
+
+def _locate_central_directory(read_at, file_size: int) -> Tuple[int, bytes]:
+    """read_central_directory over read_at(offset, size), for a file of file_size bytes"""
+    if file_size < _EOCD.size:
+        raise ValueError("file too small for an end of central directory record")
+    
+    # Usual case first: no archive comment, so the record ends the file
+    tail_start = file_size - _EOCD.size
+    tail = read_at(tail_start, _EOCD.size)
+    pos = 0
+    if not (tail[:4] == b'PK\x05\x06' and tail[-2:] == b'\x00\x00'):
+        tail_start = max(file_size - _MAX_COMMENT - 1 - _EOCD.size, 0)
+        tail = read_at(tail_start, file_size - tail_start)
+        pos = tail.rfind(b'PK\x05\x06')
+        if pos < 0 or pos + _EOCD.size > len(tail):
+            raise ValueError("no end of central directory record")
+    
+    _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+    eocd_offset = tail_start + pos
+    concat = eocd_offset - cd_size - cd_offset
+    
+    locator_offset = eocd_offset - _EOCD64_LOCATOR.size
+    if locator_offset >= 0:
+        locator = read_at(locator_offset, _EOCD64_LOCATOR.size)
+        if locator[:4] == b'PK\x06\x07':
+            _, disk, _, disks = _EOCD64_LOCATOR.unpack(locator)
+            if disk != 0 or disks > 1:
+                raise ValueError("zipfiles that span multiple disks are not supported")
+            if locator_offset >= _EOCD64.size:
+                record = read_at(locator_offset - _EOCD64.size, _EOCD64.size)
+                if record[:4] == b'PK\x06\x06':
+                    _, _, _, _, _, _, _, count, cd_size, cd_offset = _EOCD64.unpack(record)
+                    concat = locator_offset - _EOCD64.size - cd_size - cd_offset
+    
+    start = cd_offset + concat
+    if start < 0:
+        raise ValueError("bad offset for central directory")
+    return count, read_at(start, cd_size)
+
+
+def iter_central_directory(directory: bytes) -> Generator[Tuple[bytes, int, int], None, None]:
+    """Yield (raw_name, flag_bits, file_size) for each record of a central directory
+    
+    Names are left undecoded so callers can skip entries on their raw bytes.
+    Raises ValueError on anything zipfile would reject or treat specially.
+    """
+    unpack_record = _CD_RECORD.unpack_from
+    record_size = _CD_RECORD.size
+    end = len(directory)
+    pos = 0
+    while pos < end:
+        if pos + record_size > end:
+            raise ValueError("truncated central directory")
+        (signature, extract_version, flags, _, file_size,
+         name_length, extra_length, comment_length) = unpack_record(directory, pos)
+        if signature != b'PK\x01\x02':
+            raise ValueError("bad magic number for central directory")
+        if extract_version > _MAX_EXTRACT_VERSION:
+            raise ValueError(f"unsupported zip file version {extract_version / 10:.1f}")
+        
+        name_start = pos + record_size
+        extra_start = name_start + name_length
+        pos = extra_start + extra_length + comment_length
+        if file_size == 0xFFFFFFFF:
+            file_size = _zip64_file_size(directory[extra_start:extra_start + extra_length])
+        yield directory[name_start:extra_start], flags, file_size
+
+
+def _zip64_file_size(extra: bytes) -> int:
+    """Return the uncompressed size stored in a ZIP64 extra field"""
+    while len(extra) >= 4:
+        tag, length = struct.unpack_from('<HH', extra)
+        if length + 4 > len(extra):
+            raise ValueError(f"corrupt extra field {tag:04x}")
+        if tag == 0x0001 and length >= 8:
+            return struct.unpack_from('<Q', extra, 4)[0]
+        extra = extra[length + 4:]
+    raise ValueError("zip64 file size not found")
+
+# Video file extensions, lowercase with the dot. Shared by every scanner
+# rather than rebuilt per instance
+VIDEO_EXTENSIONS = frozenset({
+    '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v',
+    '.3gp', '.3g2', '.asf', '.divx', '.f4v', '.m2ts', '.mts', '.ogv',
+    '.rm', '.rmvb', '.vob', '.xvid', '.mpg', '.mpeg', '.m1v', '.m2v'
+})
+
+# platform.system() is a function call per check; the answer never changes
+_WINDOWS = platform.system() == 'Windows'
+
+@functools.lru_cache(maxsize=None)
+def _running_under_wsl() -> bool:
+    """Read /proc/version once; get_drive_letter asks for every zip path"""
+    try:
+        with open('/proc/version', 'r') as f:
+            return 'microsoft' in f.read().lower()
+    except:
+        return False
+
 class DriveScanner:
     """Handles drive detection and scanning operations"""
     
@@ -25,12 +168,7 @@ class DriveScanner:
         self.progress = ProgressDisplay()
         self.heartbeat = HeartbeatManager()
         
-        # Video file extensions
-        self.video_extensions = {
-            '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v',
-            '.3gp', '.3g2', '.asf', '.divx', '.f4v', '.m2ts', '.mts', '.ogv',
-            '.rm', '.rmvb', '.vob', '.xvid', '.mpg', '.mpeg', '.m1v', '.m2v'
-        }
+        self.video_extensions = VIDEO_EXTENSIONS
     
     def get_available_drives(self, exclude_drives: List[str] = None) -> List[str]:
         """Get list of available drives on the system"""
@@ -51,14 +189,18 @@ class DriveScanner:
             # Add common mount points
             mount_points = ['/mnt', '/media', '/Volumes']
             for mount_point in mount_points:
-                if os.path.exists(mount_point):
-                    try:
-                        for item in os.listdir(mount_point):
-                            item_path = os.path.join(mount_point, item)
-                            if os.path.ismount(item_path):
-                                potential_drives.append(item_path)
-                    except PermissionError:
-                        pass
+                try:
+                    # A mount sits on a different device than the directory
+                    # holding it, which is what ismount() checks with two
+                    # lstat calls; the parent's device only needs reading once
+                    parent_device = os.lstat(mount_point).st_dev
+                    with os.scandir(mount_point) as entries:
+                        for entry in entries:
+                            if (entry.is_dir(follow_symlinks=False) and
+                                    entry.stat(follow_symlinks=False).st_dev != parent_device):
+                                potential_drives.append(entry.path)
+                except (PermissionError, FileNotFoundError):
+                    pass
             
             # Filter out excluded drives and verify they exist
             for drive in potential_drives:
@@ -74,11 +216,7 @@ class DriveScanner:
     
     def is_wsl(self) -> bool:
         """Check if running under Windows Subsystem for Linux"""
-        try:
-            with open('/proc/version', 'r') as f:
-                return 'microsoft' in f.read().lower()
-        except:
-            return False
+        return _running_under_wsl()
     
     def get_drive_info(self, drive_path: str) -> tuple:
         """Get drive label and size information"""
@@ -128,9 +266,42 @@ class DriveScanner:
         except Exception:
             return "Unknown", 0.0
     
+    def get_physical_device(self, drive: str):
+        """Return a key that is equal for drives sharing one rotational disk
+        
+        Partitions of the same spinning disk map to the disk's name so the
+        caller can avoid scanning them concurrently. SSDs, network and
+        virtual filesystems get a key of their own since parallel reads on
+        them don't seek.
+        """
+        try:
+            dev = os.stat(drive).st_dev
+        except OSError:
+            return drive
+        
+        if platform.system() != 'Linux':
+            return dev
+        
+        major, minor = os.major(dev), os.minor(dev)
+        if major == 0:
+            # Anonymous device: NFS, SMB, FUSE, overlay, WSL drvfs
+            return drive
+        
+        sys_path = os.path.realpath(f"/sys/dev/block/{major}:{minor}")
+        if os.path.exists(os.path.join(sys_path, 'partition')):
+            sys_path = os.path.dirname(sys_path)
+        disk = os.path.basename(sys_path)
+        
+        try:
+            with open(f"/sys/block/{disk}/queue/rotational") as f:
+                rotational = f.read().strip() == '1'
+        except OSError:
+            return dev
+        return disk if rotational else drive
+    
     def get_drive_letter(self, path: str) -> str:
         """Extract drive letter or mount point from a path"""
-        if platform.system() == 'Windows':
+        if _WINDOWS:
             return path.split(':')[0] + ':'
         else:
             # For Unix-like systems, return the mount point
@@ -155,16 +326,17 @@ class DriveScanner:
             folder_count = 0
             
             try:
-                # Look for GoogleTakeout folders in root directory
-                items = list(os.listdir(drive))
-                folder_count = len([item for item in items if os.path.isdir(os.path.join(drive, item))])
+                # Look for GoogleTakeout folders in root directory; scandir
+                # entries carry their path and file type, so neither a join
+                # nor a stat is needed per item
+                with os.scandir(drive) as entries:
+                    folders = [entry for entry in entries if entry.is_dir()]
+                folder_count = len(folders)
                 
-                for item in items:
-                    if item.lower() == 'googletakeout':
-                        takeout_path = os.path.join(drive, item)
-                        if os.path.isdir(takeout_path):
-                            logger.info(f"Found GoogleTakeout folder: {takeout_path}")
-                            yield takeout_path, folder_count
+                for entry in folders:
+                    if entry.name.lower() == 'googletakeout':
+                        logger.info(f"Found GoogleTakeout folder: {entry.path}")
+                        yield entry.path, folder_count
                             
             except (PermissionError, FileNotFoundError) as e:
                 logger.warning(f"Cannot access drive {drive}: {e}")
@@ -177,17 +349,29 @@ class DriveScanner:
             'Program Files (x86)', '.git', '__pycache__', 'node_modules'
         ]))
         
-        try:
-            for root, dirs, files in os.walk(drive):
-                # Skip excluded directories
-                dirs[:] = [d for d in dirs if d not in excluded_dirs]
-                
-                for file in files:
-                    if file.lower().endswith('.zip'):
-                        yield os.path.join(root, file)
-                        
-        except (PermissionError, FileNotFoundError) as e:
-            logger.warning(f"Cannot access some paths on drive {drive}: {e}")
+        # Walk with scandir directly: its entries carry the file type from
+        # the directory read, so unlike os.walk nothing is stat'ed unless the
+        # type is unknown, and only names ending in .zip are joined into paths
+        pending = [drive]
+        while pending:
+            directory = pending.pop()
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            # Skip excluded directories
+                            if name not in excluded_dirs:
+                                subdirs.append(entry.path)
+                        elif name.lower().endswith('.zip') and entry.is_file():
+                            yield entry.path
+            except OSError as e:
+                # Like os.walk, carry on past directories that cannot be read
+                if directory == drive:
+                    logger.warning(f"Cannot access some paths on drive {drive}: {e}")
+            # Reversed so subdirectories come off the stack in os.walk's order
+            pending.extend(reversed(subdirs))
 
 class ZipFileScanner:
     """Handles ZIP file content scanning"""
@@ -196,21 +380,27 @@ class ZipFileScanner:
         self.config = config
         self.heartbeat = HeartbeatManager()
         
-        # Video file extensions
-        self.video_extensions = {
-            '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v',
-            '.3gp', '.3g2', '.asf', '.divx', '.f4v', '.m2ts', '.mts', '.ogv',
-            '.rm', '.rmvb', '.vob', '.xvid', '.mpg', '.mpeg', '.m1v', '.m2v'
-        }
+        self.video_extensions = VIDEO_EXTENSIONS
+        # Same extensions as raw name bytes, for skipping entries undecoded
+        self._video_suffixes = tuple(ext.encode('ascii') for ext in self.video_extensions)
+        self._suffix_window = max(len(suffix) for suffix in self._video_suffixes) + 1
     
     def is_target_file(self, filename: str, all_files: bool = False) -> bool:
         """Check if file is a target file (video by default, or any file if all_files=True)"""
         if all_files:
             return True
         
-        # Check if file has video extension
-        file_ext = os.path.splitext(filename.lower())[1]
-        return file_ext in self.video_extensions
+        # Check if file has video extension: what splitext would return,
+        # found by slicing. Its extension starts at the last dot, unless
+        # only dots precede that within the base name, as in ".mp4"
+        name = filename.lower()
+        dot = name.rfind('.')
+        if dot <= 0 or name[dot:] not in self.video_extensions:
+            return False
+        base_start = name.rfind('/', 0, dot)
+        if os.sep != '/':
+            base_start = max(base_start, name.rfind(os.sep, 0, dot))
+        return name[base_start + 1:dot].strip('.') != ''
     
     def scan_zip_for_videos(self, zip_path: str, all_files: bool = False, 
                           progress_callback=None) -> List[Tuple[str, int, str, Optional[str]]]:
@@ -221,39 +411,60 @@ class ZipFileScanner:
         operation_id = f"zip_scan_{zip_path}"
         
         try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_file:
-                total_files = len(zip_file.infolist())
-                
-                # Show initial status for large zip files
-                if progress_callback and total_files > 1000:
-                    progress_callback(f"Scanning large zip ({total_files:,} files)...")
-                
-                for file_info in zip_file.infolist():
-                    files_scanned += 1
+            # Reject a file that neither starts like a ZIP nor has an end of
+            # central directory record, instead of handing it to zipfile.
+            # Archives with data prepended, such as self-extractors, only
+            # have the end record
+            with open(zip_path, 'rb') as f:
+                signature = f.read(4)
+                try:
+                    directory = read_central_directory(f)
+                except ValueError:
+                    if signature not in ZIP_SIGNATURES:
+                        logger.warning(f"Cannot read zip file {zip_path}: missing ZIP signature")
+                        return []
+                    directory = None
+            
+            if directory is not None:
+                try:
+                    target_files, files_scanned = self._scan_central_directory(
+                        directory, all_files, progress_callback, operation_id, start_time)
+                except ValueError:
+                    # Something unusual in the directory: let zipfile have
+                    # the final word, including on how to fail
+                    directory = None
+            
+            if directory is None:
+                with zipfile.ZipFile(zip_path, 'r') as zip_file:
+                    total_files = len(zip_file.infolist())
                     
-                    # Show heartbeat for long operations
-                    if progress_callback and self.heartbeat.should_show_heartbeat(operation_id):
-                        elapsed = time.time() - start_time
-                        if total_files > 1000:
-                            progress_callback(f"Scanned {files_scanned:,}/{total_files:,} files ({elapsed:.1f}s)...")
-                        else:
-                            progress_callback(f"Processing... {elapsed:.1f}s elapsed")
+                    # Show initial status for large zip files
+                    if progress_callback and total_files > 1000:
+                        progress_callback(f"Scanning large zip ({total_files:,} files)...")
                     
-                    if not file_info.is_dir() and self.is_target_file(file_info.filename, all_files):
-                        target_files.append((
-                            os.path.basename(file_info.filename),
-                            file_info.file_size,
-                            file_info.filename,
-                            None  # No hashing for performance
-                        ))
-                
-                # Final status
-                if progress_callback:
-                    elapsed = time.time() - start_time
-                    if target_files:
-                        progress_callback(f"Found {len(target_files)} target files in {elapsed:.1f}s")
-                    else:
-                        progress_callback(f"No target files found ({files_scanned:,} files scanned in {elapsed:.1f}s)")
+                    for file_info in zip_file.infolist():
+                        files_scanned += 1
+                        
+                        # Show heartbeat for long operations
+                        if progress_callback and self.heartbeat.should_show_heartbeat(operation_id):
+                            self._show_scan_heartbeat(progress_callback, files_scanned, total_files, start_time)
+                        
+                        filename = file_info.filename
+                        if not filename.endswith('/') and self.is_target_file(filename, all_files):
+                            target_files.append((
+                                filename[filename.rfind('/') + 1:],
+                                file_info.file_size,
+                                filename,
+                                None  # No hashing for performance
+                            ))
+            
+            # Final status
+            if progress_callback:
+                elapsed = time.time() - start_time
+                if target_files:
+                    progress_callback(f"Found {len(target_files)} target files in {elapsed:.1f}s")
+                else:
+                    progress_callback(f"No target files found ({files_scanned:,} files scanned in {elapsed:.1f}s)")
                         
         except (zipfile.BadZipFile, PermissionError, OSError) as e:
             logger.warning(f"Cannot read zip file {zip_path}: {e}")
@@ -263,6 +474,66 @@ class ZipFileScanner:
         
         return target_files
     
+    def _scan_central_directory(self, directory: Tuple[int, bytes], all_files: bool,
+                                progress_callback, operation_id: str,
+                                start_time: float) -> Tuple[List[Tuple[str, int, str, Optional[str]]], int]:
+        """Scan a directory from read_central_directory; returns (target_files, files_scanned)
+        
+        Produces what the zipfile loop does without building a ZipInfo per
+        entry. In video mode, entries whose raw name cannot end in a video
+        extension are skipped before their name is even decoded. Raises
+        ValueError on records zipfile would handle differently.
+        """
+        total_files, data = directory
+        target_files = []
+        files_scanned = 0
+        suffixes = self._video_suffixes
+        window = self._suffix_window
+        
+        # Show initial status for large zip files
+        if progress_callback and total_files > 1000:
+            progress_callback(f"Scanning large zip ({total_files:,} files)...")
+        
+        for raw_name, flags, file_size in iter_central_directory(data):
+            files_scanned += 1
+            
+            # Show heartbeat for long operations
+            if progress_callback and self.heartbeat.should_show_heartbeat(operation_id):
+                self._show_scan_heartbeat(progress_callback, files_scanned, total_files, start_time)
+            
+            if not all_files:
+                # ASCII bytes decode to the same characters in both name
+                # encodings; anything else takes the exact check below
+                name_tail = raw_name[-window:]
+                if name_tail.isascii() and b'\x00' not in raw_name and not name_tail.lower().endswith(suffixes):
+                    continue
+            
+            # Decode and normalize the name as zipfile.ZipInfo does
+            filename = raw_name.decode('utf-8' if flags & _UTF8_NAME_FLAG else 'cp437')
+            null_byte = filename.find('\x00')
+            if null_byte >= 0:
+                filename = filename[:null_byte]
+            if os.sep != '/' and os.sep in filename:
+                filename = filename.replace(os.sep, '/')
+            
+            if not filename.endswith('/') and self.is_target_file(filename, all_files):
+                target_files.append((
+                    filename[filename.rfind('/') + 1:],
+                    file_size,
+                    filename,
+                    None  # No hashing for performance
+                ))
+        
+        return target_files, files_scanned
+    
+    def _show_scan_heartbeat(self, progress_callback, files_scanned: int, total_files: int, start_time: float):
+        """Report progress through a long zip scan"""
+        elapsed = time.time() - start_time
+        if total_files > 1000:
+            progress_callback(f"Scanned {files_scanned:,}/{total_files:,} files ({elapsed:.1f}s)...")
+        else:
+            progress_callback(f"Processing... {elapsed:.1f}s elapsed")
+    
     def extract_file_from_zip(self, zip_path: str, file_path_in_zip: str, 
                              output_dir: str = ".", progress_callback=None) -> str:
         """Extract a specific file from a ZIP archive
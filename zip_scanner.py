@@ -18,12 +18,16 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 # Import our modules
 from database import DatabaseManager
 from scanner import DriveScanner, ZipFileScanner
-from progress import ProgressDisplay, StatusReporter
+from progress import ProgressDisplay, StatusReporter, console
 from drive_processor import SequentialDriveProcessor, ThreadedDriveProcessor
 from colorama import init, Fore, Back, Style
 
-# Initialize colorama
-init(autoreset=True)
+# Initialize colorama. Terminals elsewhere understand ANSI codes already,
+# and its stdout wrapper would put a Python-level write in front of every
+# print, so it is skipped there; lines that set a color reset it themselves.
+# Piped or redirected output still needs the wrapper to strip the codes
+if sys.platform == 'win32' or not sys.stdout.isatty():
+    init(autoreset=True)
 
 # Set up logging
 logging.basicConfig(
@@ -59,8 +63,9 @@ class PySearchZips:
     def processor_config(self) -> Dict[str, Any]:
         """Build configuration dict for drive processors"""
         return {
-            'max_workers': self.config.get('max_workers', 4),
+            'max_workers': self.config.get('max_workers'),
             'batch_size': self.config.get('batch_size', 1000),
+            'scan_processes': self.config.get('scan_processes', 0),
             'google_takeout_mode': self.root_folders_only,
             'scan_all_files': self.all_files_mode,
             'quiet_mode': self.quiet_mode,
@@ -71,8 +76,10 @@ class PySearchZips:
     def load_config(self, config_path: str = None) -> Dict[str, Any]:
         """Load configuration from JSON file"""
         default_config = {
-            'max_workers': 4,
+            # None lets the threaded processor size itself from the CPU count
+            'max_workers': None,
             'batch_size': 1000,
+            'scan_processes': 0,
             'google_takeout_mode': True,
             'scan_all_files': False,
             'quiet_mode': False,
@@ -210,7 +217,10 @@ class PySearchZips:
         processor = ThreadedDriveProcessor(processor_config, self.console_lock)
         
         start_time = time.time()
-        total_zips, total_videos = processor.process_all_drives(drives, self.db)
+        try:
+            total_zips, total_videos = processor.process_all_drives(drives, self.db)
+        finally:
+            processor.close()
         elapsed_time = time.time() - start_time
         
         # Show final results
@@ -219,8 +229,9 @@ class PySearchZips:
     def _get_processor_config(self) -> Dict[str, Any]:
         """Get configuration for drive processors"""
         return {
-            'max_workers': self.config.get('max_workers', 4),
+            'max_workers': self.config.get('max_workers'),
             'batch_size': self.config.get('batch_size', 1000),
+            'scan_processes': self.config.get('scan_processes', 0),
             'google_takeout_mode': self.root_folders_only,
             'scan_all_files': self.all_files_mode,
             'quiet_mode': self.quiet_mode,
@@ -249,6 +260,8 @@ class PySearchZips:
         minutes, seconds = divmod(elapsed_time, 60)
         final_stats = self.db.get_database_summary()
         
+        # Progress output still buffered must come out before the summary
+        console.flush()
         print(f"\n{Style.BRIGHT}{Fore.WHITE}{'='*70}{Style.RESET_ALL}")
         print(f"{Style.BRIGHT}{Fore.GREEN}{scan_type} SCAN COMPLETE!{Style.RESET_ALL}")
         print(f"   Time elapsed: {Fore.YELLOW}{int(minutes):02d}:{int(seconds):02d}{Style.RESET_ALL}")
@@ -296,7 +309,8 @@ class PySearchZips:
         # Get final database state
         final_stats = self.db.get_database_summary()
         
-        # Final summary
+        # Final summary, after any progress output still buffered
+        console.flush()
         print(f"\n{Style.BRIGHT}{Fore.WHITE}{'='*70}{Style.RESET_ALL}")
         print(f"{Style.BRIGHT}{Fore.GREEN}SEQUENTIAL SCAN COMPLETE!{Style.RESET_ALL}")
         print(f"   Time elapsed: {Fore.YELLOW}{int(minutes):02d}:{int(seconds):02d}{Style.RESET_ALL}")
@@ -336,7 +350,10 @@ class PySearchZips:
         
         # Create threaded processor with console lock and process all drives
         processor = ThreadedDriveProcessor(self.processor_config, self.console_lock)
-        total_zips, total_videos = processor.process_all_drives(drives, self.db)
+        try:
+            total_zips, total_videos = processor.process_all_drives(drives, self.db)
+        finally:
+            processor.close()
         
         elapsed_time = time.time() - start_time
         minutes, seconds = divmod(elapsed_time, 60)
@@ -344,7 +361,8 @@ class PySearchZips:
         # Get final database state
         final_stats = self.db.get_database_summary()
         
-        # Final summary
+        # Final summary, after any progress output still buffered
+        console.flush()
         print(f"\n{Style.BRIGHT}{Fore.WHITE}{'='*70}{Style.RESET_ALL}")
         print(f"{Style.BRIGHT}{Fore.GREEN}THREADED SCAN COMPLETE!{Style.RESET_ALL}")
         print(f"   Time elapsed: {Fore.YELLOW}{int(minutes):02d}:{int(seconds):02d}{Style.RESET_ALL}")
@@ -361,13 +379,15 @@ class PySearchZips:
     def search_files(self, pattern: str, regex: bool = False, min_size: int = None,
                     max_size: int = None, file_types: List[str] = None):
         """Search for files matching pattern"""
-        results = self.db.search_files(pattern, regex, min_size, max_size, file_types)
+        console.flush()
+        result_count = self.db.count_search_results(pattern, regex, min_size, max_size, file_types)
         
-        if not results:
-            print(f"{Fore.YELLOW}No files found matching pattern: {pattern}")
+        if not result_count:
+            print(f"{Fore.YELLOW}No files found matching pattern: {pattern}{Style.RESET_ALL}")
             return
         
-        print(f"\n{Style.BRIGHT}{Fore.CYAN}SEARCH RESULTS ({len(results)} files found){Style.RESET_ALL}")
+        results = self.db.iter_search_files(pattern, regex, min_size, max_size, file_types)
+        print(f"\n{Style.BRIGHT}{Fore.CYAN}SEARCH RESULTS ({result_count} files found){Style.RESET_ALL}")
         print(f"{'Drive':<8} {'ZIP File':<30} {'Video File':<40} {'Size (MB)':<10}")
         print(f"{'-'*8} {'-'*30} {'-'*40} {'-'*10}")
         
@@ -377,13 +397,17 @@ class PySearchZips:
     
     def list_videos(self, limit: int = None):
         """List all video files in the database"""
-        videos = self.db.list_all_videos(limit)
+        console.flush()
+        video_count = self.db.get_database_summary()['video_files']
+        if limit:
+            video_count = min(video_count, limit)
         
-        if not videos:
-            print(f"{Fore.YELLOW}No video files found in database")
+        if not video_count:
+            print(f"{Fore.YELLOW}No video files found in database{Style.RESET_ALL}")
             return
         
-        print(f"\n{Style.BRIGHT}{Fore.CYAN}VIDEO FILES IN DATABASE ({len(videos)} files){Style.RESET_ALL}")
+        videos = self.db.list_all_videos(limit)
+        print(f"\n{Style.BRIGHT}{Fore.CYAN}VIDEO FILES IN DATABASE ({video_count} files){Style.RESET_ALL}")
         if limit:
             print(f"{Fore.YELLOW}(Showing first {limit} files){Style.RESET_ALL}")
         
@@ -396,6 +420,7 @@ class PySearchZips:
     
     def show_stats(self):
         """Show database statistics"""
+        console.flush()
         stats = self.db.get_database_summary()
         
         print(f"\n{Style.BRIGHT}{Fore.CYAN}DATABASE STATISTICS{Style.RESET_ALL}")
@@ -410,7 +435,7 @@ class PySearchZips:
         matches = self.db.get_file_extraction_info(file_name)
         
         if not matches:
-            print(f"{Fore.YELLOW}No files found matching: {file_name}")
+            print(f"{Fore.YELLOW}No files found matching: {file_name}{Style.RESET_ALL}")
             return
         
         if len(matches) == 1:
@@ -462,6 +487,7 @@ class PySearchZips:
         
         # Progress callback
         def extraction_progress(msg):
+            console.flush()
             print(f"{Fore.CYAN}[EXTRACT] {msg}{Style.RESET_ALL}")
         
         try:
@@ -501,9 +527,9 @@ class PySearchZips:
         
         if not matches:
             if file_name:
-                print(f"{Fore.YELLOW}No files found matching '{file_name}' in ZIP {zip_file_name}")
+                print(f"{Fore.YELLOW}No files found matching '{file_name}' in ZIP {zip_file_name}{Style.RESET_ALL}")
             else:
-                print(f"{Fore.YELLOW}No files found in ZIP {zip_file_name}")
+                print(f"{Fore.YELLOW}No files found in ZIP {zip_file_name}{Style.RESET_ALL}")
             return
         
         if len(matches) == 1:
@@ -554,7 +580,7 @@ class PySearchZips:
         archives = self.db.list_zip_archives(limit)
         
         if not archives:
-            print(f"{Fore.YELLOW}No ZIP archives found in database")
+            print(f"{Fore.YELLOW}No ZIP archives found in database{Style.RESET_ALL}")
             return
         
         print(f"\n{Style.BRIGHT}{Fore.CYAN}ZIP ARCHIVES ({len(archives)} archives){Style.RESET_ALL}")
@@ -572,7 +598,7 @@ class PySearchZips:
         archives = self.db.list_zip_archives()
         
         if not archives:
-            print(f"{Fore.YELLOW}No ZIP archives found in database")
+            print(f"{Fore.YELLOW}No ZIP archives found in database{Style.RESET_ALL}")
             return
         
         print(f"\n{Style.BRIGHT}{Fore.CYAN}EXTRACTING ALL FILES{Style.RESET_ALL}")